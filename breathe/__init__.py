@@ -1,7 +1,3 @@
-from breathe.directives.setup import setup as directive_setup
-from breathe.file_state_cache import setup as file_state_cache_setup
-from breathe.renderer.sphinxrenderer import setup as renderer_setup
-
 from sphinx.application import Sphinx
 
 # Keep in sync with setup.py __version__
@@ -9,6 +5,12 @@ __version__ = "4.35.0"
 
 
 def setup(app: Sphinx):
+    # Imported here so that using just the version, e.g. in breathe-apidoc, doesn't pull in the
+    # directives, renderer and the Sphinx domains they depend on
+    from breathe.directives.setup import setup as directive_setup
+    from breathe.file_state_cache import setup as file_state_cache_setup
+    from breathe.renderer.sphinxrenderer import setup as renderer_setup
+
     directive_setup(app)
     file_state_cache_setup(app)
     renderer_setup(app)
@@ -65,11 +65,11 @@ class BaseDirective(SphinxDirective):
 
     @property
     def finder_factory(self) -> FinderFactory:
-        return FinderFactory(self.env.app, self.parser_factory)
+        return self.env.temp_data["breathe_finder_factory"]
 
     @property
     def filter_factory(self) -> FilterFactory:
-        return FilterFactory(self.env.app)
+        return self.env.temp_data["breathe_filter_factory"]
 
     @property
     def kind(self) -> str:
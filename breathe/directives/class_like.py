@@ -7,7 +7,11 @@ from breathe.renderer.target import create_target_handler
 from docutils.nodes import Node
 from docutils.parsers.rst.directives import unchanged_required, unchanged, flag
 
-from typing import Any, List
+from typing import List
+
+
+# NullMaskFactory holds no state so every directive can share the one instance
+_NULL_MASK_FACTORY = NullMaskFactory()
 
 
 class _DoxygenClassLikeDirective(BaseDirective):
@@ -32,33 +36,32 @@ class _DoxygenClassLikeDirective(BaseDirective):
 
     def run(self) -> List[Node]:
         name = self.arguments[0]
+        kind = self.kind
+        options = self.options
 
         try:
-            project_info = self.project_info_factory.create_project_info(self.options)
+            project_info = self.project_info_factory.create_project_info(options)
         except ProjectError as e:
-            warning = self.create_warning(None, kind=self.kind)
-            return warning.warn("doxygen{kind}: %s" % e)
+            warning = self.create_warning(None, kind=kind)
+            return warning.warn("doxygen{kind}: ", unformatted_suffix=str(e))
 
         try:
             finder = self.finder_factory.create_finder(project_info)
         except MTimeError as e:
-            warning = self.create_warning(None, kind=self.kind)
-            return warning.warn("doxygen{kind}: %s" % e)
-
-        finder_filter = self.filter_factory.create_compound_finder_filter(name, self.kind)
-
-        # TODO: find a more specific type for the Doxygen nodes
-        matches: List[Any] = []
-        finder.filter_(finder_filter, matches)
+            warning = self.create_warning(None, kind=kind)
+            return warning.warn("doxygen{kind}: ", unformatted_suffix=str(e))
 
+        # The finder, and so its compound index, is shared by every directive using this project
+        # whichever kind it looks for, so a struct lookup reuses the index built for a class lookup
+        matches = finder.find_compounds(kind, name)
         if len(matches) == 0:
-            warning = self.create_warning(project_info, name=name, kind=self.kind)
+            warning = self.create_warning(project_info, name=name, kind=kind)
             return warning.warn('doxygen{kind}: Cannot find class "{name}" {tail}')
 
-        target_handler = create_target_handler(self.options, project_info, self.state.document)
-        filter_ = self.filter_factory.create_class_filter(name, self.options)
+        target_handler = create_target_handler(options, project_info, self.state.document)
+        filter_ = self.filter_factory.create_class_filter(name, options)
 
-        mask_factory = NullMaskFactory()
+        mask_factory = _NULL_MASK_FACTORY
         return self.render(
             matches[0], project_info, filter_, target_handler, mask_factory, self.directive_args
         )
@@ -109,12 +109,12 @@ class DoxygenFunctionDirective(BaseDirective):
             matches.append(m)
 
         # Create it ahead of time as it is cheap and it is ugly to declare it for both exception
-        # clauses below
+        # clauses below. The arguments are only turned into text if a warning is actually formatted.
         warning = self.create_warning(
             project_info,
             namespace="%s::" % namespace if namespace else "",
             function=function_name,
-            args=str(args),
+            args=args,
         )
 
         try:
@@ -9,7 +9,7 @@ from docutils.nodes import Node
 
 from docutils.parsers.rst.directives import unchanged_required, flag
 
-from typing import Any, List
+from typing import List
 
 
 class _DoxygenBaseItemDirective(BaseDirective):
@@ -48,11 +48,10 @@ class _DoxygenBaseItemDirective(BaseDirective):
 
         finder_filter = self.create_finder_filter(namespace, name)
 
-        # TODO: find a more specific type for the Doxygen nodes
-        matches: List[Any] = []
-        finder.filter_(finder_filter, matches)
+        # Only the first match is rendered so there is no need to look any further
+        node_stack = finder.find_first(finder_filter)
 
-        if len(matches) == 0:
+        if node_stack is None:
             display_name = "%s::%s" % (namespace, name) if namespace else name
             warning = self.create_warning(project_info, kind=self.kind, display_name=display_name)
             return warning.warn('doxygen{kind}: Cannot find {kind} "{display_name}" {tail}')
@@ -60,7 +59,6 @@ class _DoxygenBaseItemDirective(BaseDirective):
         target_handler = create_target_handler(self.options, project_info, self.state.document)
         filter_ = self.filter_factory.create_outline_filter(self.options)
 
-        node_stack = matches[0]
         mask_factory = NullMaskFactory()
         return self.render(
             node_stack, project_info, filter_, target_handler, mask_factory, self.directive_args
@@ -20,8 +20,10 @@ from breathe.directives.item import (
     DoxygenEnumValueDirective,
     DoxygenTypedefDirective,
 )
+from breathe.finder.factory import FinderFactory
 from breathe.parser import DoxygenParserFactory
 from breathe.project import ProjectInfoFactory
+from breathe.renderer.filter import FilterFactory
 from breathe.process import AutoDoxygenProcessHandle
 
 from sphinx.application import Sphinx
@@ -57,16 +59,26 @@ def setup(app: Sphinx) -> None:
     # has been read, we use the source-read event to set them.
     # note: the parser factory contains a cache of the parsed XML
     # note: the project_info_factory also contains some caching stuff
+    # note: the finder factory keeps the finder for each project around between directives
+    # note: the filter factory caches the filters which are safe to share between directives
     # TODO: is that actually safe for when reading in parallel?
     project_info_factory = ProjectInfoFactory(app)
     parser_factory = DoxygenParserFactory(app)
+    finder_factory = FinderFactory(app, parser_factory)
+    filter_factory = FilterFactory(app)
 
     def set_temp_data(
-        app: Sphinx, project_info_factory=project_info_factory, parser_factory=parser_factory
+        app: Sphinx,
+        project_info_factory=project_info_factory,
+        parser_factory=parser_factory,
+        finder_factory=finder_factory,
+        filter_factory=filter_factory,
     ):
         assert app.env is not None
         app.env.temp_data["breathe_project_info_factory"] = project_info_factory
         app.env.temp_data["breathe_parser_factory"] = parser_factory
+        app.env.temp_data["breathe_finder_factory"] = finder_factory
+        app.env.temp_data["breathe_filter_factory"] = filter_factory
 
     app.connect("source-read", lambda app, docname, source: set_temp_data(app))
 
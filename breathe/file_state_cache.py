@@ -1,6 +1,7 @@
 from sphinx.application import Sphinx
 from sphinx.environment import BuildEnvironment
 
+import hashlib
 import os
 from typing import List, Set
 
@@ -12,6 +13,12 @@ reStructuredText files to rebuild if the doxygen xml is modified.
 We store the information in the environment object as 'breathe_file_state'
 so that it is pickled down and stored between builds as Sphinx is designed to do.
 
+Doxygen rewrites all of its xml output every time it runs, even if nothing
+has changed, so when the modified time of a file moves on we also keep a
+digest of its contents in 'breathe_file_digests'. When the modified time of a
+file has moved on again but its contents match that digest, the
+reStructuredText files that reference it are left alone.
+
 (mypy doesn't like dynamically added attributes, hence all references to it are ignored)
 """
 
@@ -27,11 +34,32 @@ def _getmtime(filename: str):
         raise MTimeError("Cannot find file: %s" % os.path.realpath(filename))
 
 
+def _getmtime_for_read(app: Sphinx, filename: str):
+    # The xml is not expected to change part way through reading so each file only needs to be
+    # stat'ed once per build rather than once per directive
+    if not hasattr(app.env, "breathe_read_mtimes"):
+        app.env.breathe_read_mtimes = {}  # type: ignore
+
+    try:
+        return app.env.breathe_read_mtimes[filename]  # type: ignore
+    except KeyError:
+        mtime = app.env.breathe_read_mtimes[filename] = _getmtime(filename)  # type: ignore
+        return mtime
+
+
+def _getdigest(filename: str) -> str:
+    try:
+        with open(filename, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        raise MTimeError("Cannot find file: %s" % os.path.realpath(filename))
+
+
 def update(app: Sphinx, source_file: str) -> None:
     if not hasattr(app.env, "breathe_file_state"):
         app.env.breathe_file_state = {}  # type: ignore
 
-    new_mtime = _getmtime(source_file)
+    new_mtime = _getmtime_for_read(app, source_file)
     mtime, docnames = app.env.breathe_file_state.setdefault(  # type: ignore
         source_file, (new_mtime, set())
     )
@@ -48,14 +76,32 @@ def _get_outdated(
     if not hasattr(app.env, "breathe_file_state"):
         return []
 
+    digests = getattr(app.env, "breathe_file_digests", None)
+    if digests is None:
+        digests = app.env.breathe_file_digests = {}  # type: ignore
+
     stale = []
     for filename, info in app.env.breathe_file_state.items():
         old_mtime, docnames = info
-        if _getmtime(filename) > old_mtime:
-            stale.extend(docnames)
+        new_mtime = _getmtime(filename)
+        if new_mtime > old_mtime:
+            # Files are only hashed once their modified time has moved on, so the first change to a
+            # file always marks its documents as stale
+            old_digest = digests.get(filename)
+            new_digest = digests[filename] = _getdigest(filename)
+            if new_digest == old_digest:
+                # Rewritten with the same contents so just remember the new time to avoid hashing
+                # the file again on the next build
+                app.env.breathe_file_state[filename] = (new_mtime, docnames)
+            else:
+                stale.extend(docnames)
     return list(set(stale).difference(removed))
 
 
+def _clear_read_mtimes(app: Sphinx, env: BuildEnvironment, docnames: List[str]) -> None:
+    app.env.breathe_read_mtimes = {}  # type: ignore
+
+
 def _purge_doc(app: Sphinx, env: BuildEnvironment, docname: str) -> None:
     if not hasattr(app.env, "breathe_file_state"):
         return
@@ -71,6 +117,21 @@ def _purge_doc(app: Sphinx, env: BuildEnvironment, docname: str) -> None:
         del app.env.breathe_file_state[filename]
 
 
+def _purge_digests(app: Sphinx, env: BuildEnvironment) -> List[str]:
+    """Drops the digests of the files which are no longer referenced once all the documents have
+    been read. They are kept when documents are purged, as that happens just before the documents
+    using a changed file are read again and the digest taken for the file is still needed."""
+
+    digests = getattr(app.env, "breathe_file_digests", None)
+    if digests:
+        file_state = getattr(app.env, "breathe_file_state", {})
+        for filename in [filename for filename in digests if filename not in file_state]:
+            del digests[filename]
+    return []
+
+
 def setup(app: Sphinx):
     app.connect("env-get-outdated", _get_outdated)
     app.connect("env-purge-doc", _purge_doc)
+    app.connect("env-before-read-docs", _clear_read_mtimes)
+    app.connect("env-updated", _purge_digests)
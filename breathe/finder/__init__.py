@@ -11,6 +11,17 @@ def stack(element, list_):
     return output
 
 
+class FirstMatchList(list):
+    """Matches list for searches which only want the first match, the item finders stop walking
+    the hierarchy once it has been added"""
+
+
+def found_first(matches) -> bool:
+    """Whether the search only wants the first match and has found it"""
+
+    return isinstance(matches, FirstMatchList) and len(matches) > 0
+
+
 class ItemFinder:
     def __init__(self, project_info: ProjectInfo, data_object, item_finder_factory):
         self.data_object = data_object
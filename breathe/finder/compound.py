@@ -1,4 +1,4 @@
-from breathe.finder import ItemFinder, stack
+from breathe.finder import ItemFinder, found_first, stack
 from breathe.renderer.filter import Filter
 
 
@@ -18,14 +18,20 @@ class CompoundDefTypeSubItemFinder(ItemFinder):
         node_stack = stack(self.data_object, ancestors)
         if filter_.allow(node_stack):
             matches.append(node_stack)
+            if found_first(matches):
+                return
 
         for sectiondef in self.data_object.sectiondef:
             finder = self.item_finder_factory.create_finder(sectiondef)
             finder.filter_(node_stack, filter_, matches)
+            if found_first(matches):
+                return
 
         for innerclass in self.data_object.innerclass:
             finder = self.item_finder_factory.create_finder(innerclass)
             finder.filter_(node_stack, filter_, matches)
+            if found_first(matches):
+                return
 
 
 class SectionDefTypeSubItemFinder(ItemFinder):
@@ -35,10 +41,14 @@ class SectionDefTypeSubItemFinder(ItemFinder):
         node_stack = stack(self.data_object, ancestors)
         if filter_.allow(node_stack):
             matches.append(node_stack)
+            if found_first(matches):
+                return
 
         for memberdef in self.data_object.memberdef:
             finder = self.item_finder_factory.create_finder(memberdef)
             finder.filter_(node_stack, filter_, matches)
+            if found_first(matches):
+                return
 
 
 class MemberDefTypeSubItemFinder(ItemFinder):
@@ -48,12 +58,16 @@ class MemberDefTypeSubItemFinder(ItemFinder):
 
         if filter_.allow(node_stack):
             matches.append(node_stack)
+            if found_first(matches):
+                return
 
         if data_object.kind == "enum":
             for value in data_object.enumvalue:
                 value_stack = stack(value, node_stack)
                 if filter_.allow(value_stack):
                     matches.append(value_stack)
+                    if found_first(matches):
+                        return
 
 
 class RefTypeSubItemFinder(ItemFinder):
@@ -1,4 +1,4 @@
-from breathe.finder import ItemFinder
+from breathe.finder import FirstMatchList, ItemFinder, stack
 from breathe.finder import index as indexfinder
 from breathe.finder import compound as compoundfinder
 from breathe.parser import DoxygenParserFactory
@@ -7,7 +7,7 @@ from breathe.renderer.filter import Filter
 
 from sphinx.application import Sphinx
 
-from typing import Dict, Type
+from typing import Any, Dict, List, Optional, Tuple, Type
 
 
 class _CreateCompoundTypeSubFinder:
@@ -37,6 +37,8 @@ class Finder:
     def __init__(self, root, item_finder_factory: DoxygenItemFinderFactory) -> None:
         self._root = root
         self.item_finder_factory = item_finder_factory
+        # TODO: find a more specific type for the Doxygen nodes
+        self._compound_index: Optional[Dict[Tuple[str, str], List[Any]]] = None
 
     def filter_(self, filter_: Filter, matches) -> None:
         """Adds all nodes which match the filter into the matches list"""
@@ -44,6 +46,35 @@ class Finder:
         item_finder = self.item_finder_factory.create_finder(self._root)
         item_finder.filter_([_FakeParentNode()], filter_, matches)
 
+    def find_first(self, filter_: Filter) -> Optional[List[Any]]:
+        """Returns the first node stack which matches the filter, or None if nothing matches.
+
+        Finds the same node stack as the first entry of the matches from filter_ but stops walking
+        the hierarchy, and parsing compound files, once it has been found.
+        """
+
+        matches = FirstMatchList()
+        self.filter_(filter_, matches)
+        return matches[0] if matches else None
+
+    def find_compounds(self, kind: str, name: str) -> List[Any]:
+        """Returns the node stacks for the index compounds with the given kind and name.
+
+        Gives the same matches as filtering with FilterFactory.create_compound_finder_filter but
+        without walking, and parsing the files for, every compound in the project. Only valid for
+        finders created from the index root.
+        """
+
+        if self._compound_index is None:
+            index: Dict[Tuple[str, str], List[Any]] = {}
+            for compound in self._root.get_compound():
+                index.setdefault((compound.kind, compound.name), []).append(compound)
+            self._compound_index = index
+
+        ancestors = [self._root, _FakeParentNode()]
+        compounds = self._compound_index.get((kind, name), [])
+        return [stack(compound, ancestors) for compound in compounds]
+
     def root(self):
         return self._root
 
@@ -53,10 +84,22 @@ class FinderFactory:
         self.app = app
         self.parser_factory = parser_factory
         self.parser = parser_factory.create_index_parser()
+        self.finder_store: Dict[ProjectInfo, Finder] = {}
 
     def create_finder(self, project_info: ProjectInfo) -> Finder:
+        # Always go through the parser, even when we have a finder for this project already, as it
+        # records the index file as a dependency of the current document and checks it still exists
         root = self.parser.parse(project_info)
-        return self.create_finder_from_root(root, project_info)
+        try:
+            finder = self.finder_store[project_info]
+            if finder.root() is root:
+                return finder
+        except KeyError:
+            pass
+
+        finder = self.create_finder_from_root(root, project_info)
+        self.finder_store[project_info] = finder
+        return finder
 
     def create_finder_from_root(self, root, project_info: ProjectInfo) -> Finder:
         finders: Dict[str, Type[ItemFinder]] = {
@@ -1,4 +1,4 @@
-from breathe.finder import ItemFinder, stack
+from breathe.finder import ItemFinder, found_first, stack
 from breathe.renderer.filter import Filter, FilterFactory
 from breathe.parser import DoxygenCompoundParser
 
@@ -16,6 +16,8 @@ class DoxygenTypeSubItemFinder(ItemFinder):
         for compound in compounds:
             compound_finder = self.item_finder_factory.create_finder(compound)
             compound_finder.filter_(node_stack, filter_, matches)
+            if found_first(matches):
+                return
 
 
 class CompoundTypeSubItemFinder(ItemFinder):
@@ -38,6 +40,8 @@ class CompoundTypeSubItemFinder(ItemFinder):
         # Match against compound object
         if filter_.allow(node_stack):
             matches.append(node_stack)
+            if found_first(matches):
+                return
 
         # Descend to member children
         members = self.data_object.get_member()
@@ -58,6 +62,8 @@ class CompoundTypeSubItemFinder(ItemFinder):
                     "memberdef", member_stack[0].refid
                 )
                 finder.filter_(node_stack, ref_filter, matches)
+                if found_first(matches):
+                    return
         else:
             # Read in the xml file referenced by the compound and descend into that as well
             file_data = self.compound_parser.parse(self.data_object.refid)
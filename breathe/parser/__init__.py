@@ -6,6 +6,8 @@ from breathe.project import ProjectInfo
 
 from sphinx.application import Sphinx
 
+from typing import Any, Dict
+
 
 class ParserError(Exception):
     def __init__(self, error: Exception, filename: str):
@@ -58,8 +60,16 @@ class DoxygenCompoundParser(Parser):
         super().__init__(app, cache)
 
         self.project_info = project_info
+        # Compound parsers are created for a single directive, so once a refid has been resolved
+        # and recorded as a dependency of the current document it doesn't need to be again
+        self.refid_cache: Dict[str, Any] = {}
 
     def parse(self, refid: str):
+        try:
+            return self.refid_cache[refid]
+        except KeyError:
+            pass
+
         filename = path_handler.resolve_path(
             self.app,
             self.project_info.project_path(),
@@ -70,18 +80,20 @@ class DoxygenCompoundParser(Parser):
 
         try:
             # Try to get from our cache
-            return self.cache[filename]
+            result = self.cache[filename]
         except KeyError:
             # If that fails, parse it afresh
             try:
                 result = compound.parse(filename)
                 self.cache[filename] = result
-                return result
             except compound.ParseError as e:
                 raise ParserError(e, filename)
             except compound.FileIOError as e:
                 raise FileIOError(e, filename)
 
+        self.refid_cache[refid] = result
+        return result
+
 
 class DoxygenParserFactory:
     def __init__(self, app: Sphinx) -> None:
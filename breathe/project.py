@@ -6,7 +6,7 @@ import os
 import fnmatch
 
 
-from typing import Dict
+from typing import Dict, Optional, Tuple
 
 
 class ProjectError(BreatheError):
@@ -57,6 +57,9 @@ class ProjectInfo:
         self._project_path = path
         self._source_path = source_path
         self._reference = reference
+        self._domain_for_file_store: Dict[str, str] = {}
+        self._sphinx_abs_path_store: Dict[str, str] = {}
+        self._abs_project_path: Optional[str] = None
 
     def name(self) -> str:
         return self._name
@@ -78,6 +81,19 @@ class ProjectInfo:
         full_xml_project_path = os.path.join(self.app.confdir, self._project_path, file_)
         return os.path.relpath(full_xml_project_path, self.app.srcdir)
 
+    def abs_path_to_xml_file(self, file_: str) -> str:
+        """
+        Returns the absolute path to the specified file assuming that the specified file is a path
+        relative to the doxygen xml output directory.
+        """
+
+        if self._abs_project_path is None:
+            # os.path.join does the appropriate handling if _project_path is an absolute path
+            self._abs_project_path = os.path.abspath(
+                os.path.join(self.app.confdir, self._project_path)
+            )
+        return os.path.abspath(os.path.join(self._abs_project_path, file_))
+
     def sphinx_abs_path_to_file(self, file_):
         """
         Prepends os.path.sep to the value returned by relative_path_to_file.
@@ -85,12 +101,29 @@ class ProjectInfo:
         This is to match Sphinx's concept of an absolute path which starts from the top-level source
         directory of the project.
         """
-        return os.path.sep + self.relative_path_to_xml_file(file_)
+        # Images are often referenced from many places and the paths involved don't change during
+        # a build
+        try:
+            return self._sphinx_abs_path_store[file_]
+        except KeyError:
+            path = os.path.sep + self.relative_path_to_xml_file(file_)
+            self._sphinx_abs_path_store[file_] = path
+            return path
 
     def reference(self):
         return self._reference
 
     def domain_for_file(self, file_: str) -> str:
+        # Asked for every rendered node, but there are only as many answers as there are files and
+        # the config doesn't change during a build
+        try:
+            return self._domain_for_file_store[file_]
+        except KeyError:
+            domain = self._domain_for_file(file_)
+            self._domain_for_file_store[file_] = domain
+            return domain
+
+    def _domain_for_file(self, file_: str) -> str:
         extension = file_.split(".")[-1]
         try:
             domain = self.app.config.breathe_domain_by_extension[extension]
@@ -116,6 +149,9 @@ class ProjectInfoFactory:
         self._default_build_dir = os.path.dirname(app.doctreedir.rstrip(os.sep))
         self.project_count = 0
         self.project_info_store: Dict[str, ProjectInfo] = {}
+        self.project_info_for_options_store: Dict[
+            Tuple[Optional[str], Optional[str]], ProjectInfo
+        ] = {}
         self.project_info_for_auto_store: Dict[str, AutoProjectInfo] = {}
         self.auto_project_info_store: Dict[str, AutoProjectInfo] = {}
 
@@ -147,6 +183,17 @@ class ProjectInfoFactory:
             )
 
     def create_project_info(self, options) -> ProjectInfo:
+        # Only the 'project' and 'path' options influence the result, and the config values we
+        # read don't change during a build, so directives with the same values can share the lookup
+        key = (options.get("project"), options.get("path"))
+        try:
+            return self.project_info_for_options_store[key]
+        except KeyError:
+            project_info = self._create_project_info(options)
+            self.project_info_for_options_store[key] = project_info
+            return project_info
+
+    def _create_project_info(self, options) -> ProjectInfo:
         config = self.app.config
         name = config.breathe_default_project
 
@@ -204,7 +204,7 @@ from breathe import path_handler
 from sphinx.application import Sphinx
 
 import os
-from typing import Any, Callable, Dict, List
+from typing import Any, Callable, Dict, FrozenSet, List, Tuple
 
 
 class UnrecognisedKindError(Exception):
@@ -578,6 +578,11 @@ class FilterFactory:
 
     def __init__(self, app: Sphinx) -> None:
         self.app = app
+        # Filters are built from immutable selectors and accessors so they can be shared between
+        # directives asking for the same thing. Note: the file filter gathers state while it is
+        # being applied so it must not be stored here.
+        self.class_filter_store: Dict[Tuple[str, FrozenSet[Tuple[str, Any]]], Filter] = {}
+        self.compound_finder_filter_store: Dict[Tuple[str, str], Filter] = {}
 
     def create_render_filter(self, kind: str, options: Dict[str, Any]) -> Filter:
         """Render filter for group & namespace blocks"""
@@ -621,18 +626,26 @@ class FilterFactory:
     def create_class_filter(self, target: str, options: Dict[str, Any]) -> Filter:
         """Content filter for classes based on various directive options"""
 
+        key = (target, frozenset(options.items()))
+        try:
+            return self.class_filter_store[key]
+        except KeyError:
+            pass
+
         # Generate new dictionary from defaults
         filter_options = dict((entry, "") for entry in self.app.config.breathe_default_members)
 
         # Update from the actual options
         filter_options.update(options)
 
-        return AndFilter(
+        filter_ = AndFilter(
             self.create_class_member_filter(filter_options),
             self.create_innerclass_filter(filter_options, outerclass=target),
             self.create_outline_filter(filter_options),
             self.create_show_filter(filter_options),
         )
+        self.class_filter_store[key] = filter_
+        return filter_
 
     def create_innerclass_filter(self, options: Dict[str, Any], outerclass: str = "") -> Filter:
         """
@@ -1050,8 +1063,13 @@ class FilterFactory:
     def create_compound_finder_filter(self, name: str, kind: str) -> Filter:
         """Returns a filter which looks for a compound with the specified name and kind."""
 
-        node = Node()
-        return (node.node_type == "compound") & (node.kind == kind) & (node.name == name)
+        try:
+            return self.compound_finder_filter_store[(name, kind)]
+        except KeyError:
+            node = Node()
+            filter_ = (node.node_type == "compound") & (node.kind == kind) & (node.name == name)
+            self.compound_finder_filter_store[(name, kind)] = filter_
+            return filter_
 
     def create_finder_filter(self, kind: str, name: str) -> Filter:
         """Returns a filter which looks for the compound node from the index which is a group node
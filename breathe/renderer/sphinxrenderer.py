@@ -12,33 +12,45 @@ from sphinx.application import Sphinx
 from sphinx.directives import ObjectDescription
 from sphinx.domains import cpp, c, python
 from sphinx.util.nodes import nested_parse_with_titles
-from sphinx.util import url_re
-from sphinx.ext.graphviz import graphviz
+from sphinx.util import logging, url_re
 
 from docutils import nodes
 from docutils.nodes import Node, TextElement
 from docutils.statemachine import StringList, UnexpectedIndentationError
 from docutils.parsers.rst.states import Text
 
-try:
-    from sphinxcontrib import phpdomain as php  # type: ignore
-except ImportError:
-    php = None
-
-try:
-    from sphinx_csharp import csharp as cs  # type: ignore
-except ImportError:
-    cs = None
-
+import collections
+import functools
+import itertools
 import re
 import textwrap
-from typing import Any, Callable, cast, Dict, List, Optional, Type, Union
+from types import SimpleNamespace
+from typing import Any, Callable, cast, Dict, List, Optional, Tuple, Type, Union
 
 ContentCallback = Callable[[addnodes.desc_content], None]
 Declarator = Union[addnodes.desc_signature, addnodes.desc_signature_line]
 DeclaratorCallback = Callable[[Declarator], None]
 
-_debug_indent = 0
+logger = logging.getLogger(__name__)
+
+# The indentation of the debug trace output, two spaces per nested directive or qualification
+_debug_indent = ""
+
+# Marks the absence of a value where None could be a valid one
+_missing = object()
+
+# Whether declarations start with a desc_sig_keyword for their object type rather than a
+# desc_annotation. The new style was introduced in Sphinx v4.
+_new_style_obj_type = sphinx.version_info[0] >= 4
+
+# Whether Sphinx has a retval field, it was added in v4.3. Before that they are rendered as returns.
+_sphinx_has_retval_field = sphinx.version_info[0:2] >= (4, 3)
+
+# Compound kinds which don't contribute to the qualified name of the members found through them
+_unqualified_compound_kinds = frozenset(("file", "namespace", "group"))
+
+# Compound kinds which are rendered like a file rather than as a declaration
+_file_like_compound_kinds = frozenset(("file", "dir", "page", "example", "group"))
 
 
 class WithContext:
@@ -157,11 +169,25 @@ class PyClasslike(BaseObject, python.PyClasslike):
 
 # ----------------------------------------------------------------------------
 
-# Create multi-inheritance classes to merge BaseObject from Breathe with
-# classes from phpdomain.
-# We use capitalization (and the namespace) to differentiate between the two
+# The phpdomain and sphinx_csharp extensions are optional and most projects don't use them, so
+# they are only imported, and the classes for their directives created, the first time a directive
+# for their domain is needed.
+
+
+@functools.lru_cache(maxsize=None)
+def _get_php_domain():
+    """Returns the phpdomain module and the mapping from node kinds to its directives and their
+    names, or None if phpdomain isn't installed.
+    """
+
+    try:
+        from sphinxcontrib import phpdomain as php  # type: ignore
+    except ImportError:
+        return None
 
-if php is not None:
+    # Create multi-inheritance classes to merge BaseObject from Breathe with
+    # classes from phpdomain.
+    # We use capitalization (and the namespace) to differentiate between the two
 
     class PHPNamespaceLevel(BaseObject, php.PhpNamespacelevel):
         """Description of a PHP item *in* a namespace (not the space itself)."""
@@ -177,10 +203,26 @@ if php is not None:
     class PHPGlobalLevel(BaseObject, php.PhpGloballevel):
         pass
 
+    php_classes = {
+        "function": (PHPNamespaceLevel, "function"),
+        "class": (PHPClassLike, "class"),
+        "attr": (PHPClassMember, "attr"),
+        "method": (PHPClassMember, "method"),
+        "global": (PHPGlobalLevel, "global"),
+    }
+    return php, php_classes
 
-# ----------------------------------------------------------------------------
 
-if cs is not None:
+@functools.lru_cache(maxsize=None)
+def _get_cs_classes():
+    """Returns the mapping from node kinds to sphinx_csharp directives and their names, or None if
+    sphinx_csharp isn't installed.
+    """
+
+    try:
+        from sphinx_csharp import csharp as cs  # type: ignore
+    except ImportError:
+        return None
 
     class CSharpCurrentNamespace(BaseObject, cs.CSharpCurrentNamespace):
         pass
@@ -227,13 +269,42 @@ if cs is not None:
     class CSharpXRefRole(BaseObject, cs.CSharpXRefRole):
         pass
 
+    return {
+        # 'doxygen-name': (CSharp class, key in CSharpDomain.object_types)
+        "namespace": (CSharpNamespacePlain, "namespace"),
+        "class": (CSharpClass, "class"),
+        "struct": (CSharpStruct, "struct"),
+        "interface": (CSharpInterface, "interface"),
+        "function": (CSharpMethod, "function"),
+        "method": (CSharpMethod, "method"),
+        "variable": (CSharpVariable, "var"),
+        "property": (CSharpProperty, "property"),
+        "event": (CSharpEvent, "event"),
+        "enum": (CSharpEnum, "enum"),
+        "enumvalue": (CSharpEnumValue, "enumerator"),
+        "attribute": (CSharpAttribute, "attr"),
+        # Fallback to cpp domain
+        "typedef": (CPPTypeObject, "type"),
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def _get_graphviz_node_class():
+    """Returns the graphviz node class. sphinx.ext.graphviz is only imported once a project
+    actually contains a graph.
+    """
+
+    from sphinx.ext.graphviz import graphviz
+
+    return graphviz
+
 
 # ----------------------------------------------------------------------------
 
 
 class DomainDirectiveFactory:
     # A mapping from node kinds to domain directives and their names.
-    cpp_classes = {
+    cpp_classes: Dict[str, Tuple[Type[ObjectDescription], str]] = {
         "variable": (CPPMemberObject, "var"),
         "class": (CPPClassObject, "class"),
         "struct": (CPPClassObject, "struct"),
@@ -252,7 +323,7 @@ class DomainDirectiveFactory:
         "enumvalue": (CPPEnumeratorObject, "enumerator"),
         "define": (CMacroObject, "macro"),
     }
-    c_classes = {
+    c_classes: Dict[str, Tuple[Type[ObjectDescription], str]] = {
         "variable": (CMemberObject, "var"),
         "function": (CFunctionObject, "function"),
         "define": (CMacroObject, "macro"),
@@ -262,7 +333,7 @@ class DomainDirectiveFactory:
         "enumvalue": (CEnumeratorObject, "enumerator"),
         "typedef": (CTypeObject, "type"),
     }
-    python_classes = {
+    python_classes: Dict[str, Tuple[Type[ObjectDescription], str]] = {
         # TODO: PyFunction is meant for module-level functions
         #       and PyAttribute is meant for class attributes, not module-level variables.
         #       Somehow there should be made a distinction at some point to get the correct
@@ -272,66 +343,46 @@ class DomainDirectiveFactory:
         "class": (PyClasslike, "class"),
         "namespace": (PyClasslike, "class"),
     }
-
-    if php is not None:
-        php_classes = {
-            "function": (PHPNamespaceLevel, "function"),
-            "class": (PHPClassLike, "class"),
-            "attr": (PHPClassMember, "attr"),
-            "method": (PHPClassMember, "method"),
-            "global": (PHPGlobalLevel, "global"),
-        }
-        php_classes_default = php_classes["class"]  # Directive when no matching ones were found
-
-    if cs is not None:
-        cs_classes = {
-            # 'doxygen-name': (CSharp class, key in CSharpDomain.object_types)
-            "namespace": (CSharpNamespacePlain, "namespace"),
-            "class": (CSharpClass, "class"),
-            "struct": (CSharpStruct, "struct"),
-            "interface": (CSharpInterface, "interface"),
-            "function": (CSharpMethod, "function"),
-            "method": (CSharpMethod, "method"),
-            "variable": (CSharpVariable, "var"),
-            "property": (CSharpProperty, "property"),
-            "event": (CSharpEvent, "event"),
-            "enum": (CSharpEnum, "enum"),
-            "enumvalue": (CSharpEnumValue, "enumerator"),
-            "attribute": (CSharpAttribute, "attr"),
-            # Fallback to cpp domain
-            "typedef": (CPPTypeObject, "type"),
-        }
+    # The domains whose directives only depend on the node kind. Anything not in here, other than
+    # php and cs when their extensions are installed, is handled as cpp.
+    domain_classes = {
+        "c": c_classes,
+        "py": python_classes,
+        "cpp": cpp_classes,
+    }
 
     @staticmethod
     def create(domain: str, args) -> ObjectDescription:
         cls = cast(Type[ObjectDescription], None)
         name = cast(str, None)
-        if domain == "c":
-            cls, name = DomainDirectiveFactory.c_classes[args[0]]
-        elif domain == "py":
-            cls, name = DomainDirectiveFactory.python_classes[args[0]]
-        elif php is not None and domain == "php":
-            separators = php.separators
+        php_domain = _get_php_domain() if domain == "php" else None
+        cs_classes = _get_cs_classes() if domain == "cs" else None
+        if php_domain is not None:
+            php, php_classes = php_domain
+            method_separator = php.separators["method"]
+            attr_separator = php.separators["attr"]
             arg_0 = args[0]
-            if any([separators["method"] in n for n in args[1]]):
-                if any([separators["attr"] in n for n in args[1]]):
+            if any(method_separator in n for n in args[1]):
+                if any(attr_separator in n for n in args[1]):
                     arg_0 = "attr"
                 else:
                     arg_0 = "method"
             else:
-                if arg_0 in ["variable"]:
+                if arg_0 == "variable":
                     arg_0 = "global"
 
-            if arg_0 in DomainDirectiveFactory.php_classes:
-                cls, name = DomainDirectiveFactory.php_classes[arg_0]  # type: ignore
-            else:
-                cls, name = DomainDirectiveFactory.php_classes_default  # type: ignore
+            # The class directive is used when no matching one was found
+            cls, name = php_classes.get(arg_0, php_classes["class"])
 
-        elif cs is not None and domain == "cs":
-            cls, name = DomainDirectiveFactory.cs_classes[args[0]]
+        elif cs_classes is not None:
+            cls, name = cs_classes[args[0]]
         else:
-            domain = "cpp"
-            cls, name = DomainDirectiveFactory.cpp_classes[args[0]]  # type: ignore
+            try:
+                classes = DomainDirectiveFactory.domain_classes[domain]
+            except KeyError:
+                domain = "cpp"
+                classes = DomainDirectiveFactory.cpp_classes
+            cls, name = classes[args[0]]
         # Replace the directive name because domain directives don't know how to handle
         # Breathe's "doxygen" directives.
         assert ":" not in name
@@ -339,73 +390,166 @@ class DomainDirectiveFactory:
         return cls(*args)
 
 
-class NodeFinder(nodes.SparseNodeVisitor):
-    """Find the Docutils desc_signature declarator and desc_content nodes."""
+# A desc node, as created by the domain directives, has its desc_signature nodes followed by its
+# desc_content node as direct children, so these only need to look at its children rather than
+# walking the whole declaration.
+
+
+def find_declarator(desc):
+    """Returns the declarator of a desc node. That is the last line of its last signature, or the
+    signature itself if it isn't split into lines, as it contains the actual declarator rather than
+    "template <...>".
+    """
+
+    signode = [n for n in desc.children if isinstance(n, addnodes.desc_signature)][-1]
+    lines = [n for n in signode.children if isinstance(n, addnodes.desc_signature_line)]
+    return lines[-1] if lines else signode
+
+
+def find_content(desc):
+    """Returns the desc_content node of a desc node."""
+
+    for n in reversed(desc.children):
+        if isinstance(n, addnodes.desc_content):
+            return n
+    return None
+
+
+def get_filename(node) -> Optional[str]:
+    """Returns the name of a file where the declaration represented by node is located."""
+    try:
+        return node.location.file
+    except AttributeError:
+        return None
+
+
+def get_base_decl(base, with_prot: bool = True) -> str:
+    """Returns the declaration of a base class, as written after the colon of a class declaration,
+    e.g. "public virtual Base".
+    """
+
+    decl = base.content_[0].value
+    if base.virt == "virtual":
+        decl = "virtual " + decl
+    if with_prot and base.prot is not None:
+        decl = base.prot + " " + decl
+    return decl
+
+
+def intersperse(iterable, delimiter) -> list:
+    """Returns a list of the items with the delimiter placed between each of them"""
+
+    items = list(iterable)
+    if not items:
+        return items
+    result = [delimiter] * (2 * len(items) - 1)
+    result[::2] = items
+    return result
+
+
+# Matches the "(*)" or "(Ns::*)" part of a function pointer or reference type which the parameter
+# name needs to be placed into
+_param_name_slot_re = re.compile(r"(\((?:\w+::)*[*&]+)(\))")
+
+
+def _nodes_to_text(nodelist) -> str:
+    """Returns the text of the given docutils nodes, without a join for the common single node."""
+    if len(nodelist) == 1:
+        return nodelist[0].astext()
+    return "".join([n.astext() for n in nodelist])
+
+
+class _RecordingDefinitionParser(cpp.DefinitionParser):
+    """A C++ definition parser which keeps its warnings instead of reporting them, so that they can
+    be reported for every occurrence of a parsed template parameter."""
 
-    def __init__(self, document):
-        super().__init__(document)
-        self.declarator = None
-        self.content = None
+    def __init__(self, definition: str, config) -> None:
+        super().__init__(definition, location=None, config=config)  # type: ignore
+        self.warnings: List[str] = []
 
-    def visit_desc_signature(self, node):
-        # Find the last signature node because it contains the actual declarator
-        # rather than "template <...>". In Sphinx 1.4.1 we'll be able to use sphinx_cpp_tagname:
-        # https://github.com/michaeljones/breathe/issues/242
-        self.declarator = node
+    def warn(self, msg: str) -> None:
+        self.warnings.append(msg)
 
-    def visit_desc_signature_line(self, node):
-        # In sphinx 1.5, there is now a desc_signature_line node within the desc_signature
-        # This should be used instead
-        self.declarator = node
 
-    def visit_desc_content(self, node):
-        self.content = node
-        # The SparseNodeVisitor seems to not actually be universally Sparse,
-        # but only for nodes known to Docutils.
-        # So if there are extensions with new node types in the content,
-        # then the visitation will fail.
-        # We anyway don't need to visit the actual content, so skip it.
-        raise nodes.SkipChildren
+@functools.lru_cache(maxsize=4096)
+def _parse_template_param(
+    type_text: str, name: str, id_attributes: Tuple[str, ...], paren_attributes: Tuple[str, ...]
+) -> Tuple[Optional[str], Tuple[str, ...]]:
+    """Returns the declaration of a template parameter with the given type and name, or None if
+    the type can't be parsed, together with the warnings of the parser.
 
+    The same parameters show up in many templates, so the results are remembered. The id and paren
+    attributes are the only config values the parser looks at.
+    """
+
+    config = SimpleNamespace(
+        cpp_id_attributes=list(id_attributes), cpp_paren_attributes=list(paren_attributes)
+    )
+    parser = _RecordingDefinitionParser(type_text, config)
+    try:
+        # we really should use _parse_template_parameter()
+        # but setting a name there is non-trivial, so we use type
+        ast = parser._parse_type(named="single", outer="templateParam")
+        assert ast.name is None
+        ast.name = cpp.ASTNestedName(
+            names=[cpp.ASTNestedNameElement(cpp.ASTIdentifier(name), None)],
+            templates=[False],
+            rooted=False,
+        )
+        decl: Optional[str] = str(ast)
+    except cpp.DefinitionError:
+        decl = None
+    return decl, tuple(parser.warnings)
+
+
+def _insert_template_param_name(type_text: str, name: str, config, get_location) -> Optional[str]:
+    """Returns the declaration of a template parameter with the given type and name, or None if
+    the type can't be parsed. Any warnings of the parser are reported at the location returned by
+    get_location, which is only called when there are warnings.
+    """
+
+    decl, warnings = _parse_template_param(
+        type_text, name, tuple(config.cpp_id_attributes), tuple(config.cpp_paren_attributes)
+    )
+    if warnings:
+        location = get_location()
+        for msg in warnings:
+            logger.warning(msg, location=location)
+    return decl
 
-def intersperse(iterable, delimiter):
-    it = iter(iterable)
-    yield next(it)
-    for x in it:
-        yield delimiter
-        yield x
+
+def _linked_text_to_string(node) -> str:
+    """Convert Doxygen node content to a string."""
+    if node is None:
+        return ""
+    return " ".join(
+        value if isinstance(value, str) else value.valueOf_
+        for value in (p.value for p in node.content_)
+    )
 
 
 def get_param_decl(param):
-    def to_string(node):
-        """Convert Doxygen node content to a string."""
-        result = []
-        if node is not None:
-            for p in node.content_:
-                value = p.value
-                if not isinstance(value, str):
-                    value = value.valueOf_
-                result.append(value)
-        return " ".join(result)
-
-    param_type = to_string(param.type_)
+    param_type = _linked_text_to_string(param.type_)
     param_name = param.declname if param.declname else param.defname
     if not param_name:
         param_decl = param_type
     else:
-        param_decl, number_of_subs = re.subn(
-            r"(\((?:\w+::)*[*&]+)(\))", r"\g<1>" + param_name + r"\g<2>", param_type
+        param_decl, number_of_subs = _param_name_slot_re.subn(
+            r"\g<1>" + param_name + r"\g<2>", param_type
         )
         if number_of_subs == 0:
             param_decl = param_type + " " + param_name
     if param.array:
         param_decl += param.array
     if param.defval:
-        param_decl += " = " + to_string(param.defval)
+        param_decl += " = " + _linked_text_to_string(param.defval)
 
     return param_decl
 
 
+_angle_bracket_re = re.compile(r"[<>]")
+
+
 def get_definition_without_template_args(data_object):
     """
     Return data_object.definition removing any template arguments from the class name in the member
@@ -422,20 +566,24 @@ def get_definition_without_template_args(data_object):
         pos = qual_name_start - 1
         if definition[pos] == ">":
             bracket_count = 0
-            # Iterate back through the characters of the definition counting matching braces and
-            # then remove all braces and everything between
-            while pos > 0:
-                if definition[pos] == ">":
+            # Iterate back through the angle brackets of the definition (leaving out the first
+            # character) counting matching braces and then remove all braces and everything between
+            brackets = list(_angle_bracket_re.finditer(definition, 1, qual_name_start))
+            for bracket in reversed(brackets):
+                if bracket.group() == ">":
                     bracket_count += 1
-                elif definition[pos] == "<":
+                else:
                     bracket_count -= 1
                     if bracket_count == 0:
-                        definition = definition[:pos] + definition[qual_name_start:]
+                        definition = definition[: bracket.start()] + definition[qual_name_start:]
                         break
-                pos -= 1
     return definition
 
 
+# Matches the tag that marks a verbatim block as embedded rst and captures its variant, if any
+_embed_rst_re = re.compile(r"\s*embed:rst(?::(leading-asterisk|leading-slashes|inline))?")
+
+
 class InlineText(Text):
     """
     Add a custom docutils class to allow parsing inline text. This is to be
@@ -479,6 +627,88 @@ class InlineText(Text):
         return [], next_state, []
 
 
+# docutils only reads these, so every inline parse can share them
+_inline_state_machine_kwargs = {
+    "state_classes": (InlineText,),
+    "initial_state": "InlineText",
+}
+
+
+def _collect_description_nodes(node, depth, field_lists, notes, warnings, paragraphs, pulled):
+    """Finds the nodes detaileddescription pulls up or collapses in a single walk.
+
+    Field lists are pulled up first, then notes and then warnings, so a note inside a field list
+    stays there and so does a warning inside a note. depth is 0 outside of them, 1 inside a
+    warning, 2 inside a note and 3 inside a field list. Only a paragraph directly inside another
+    one can be collapsed, and collapsing only moves children of a paragraph into a paragraph, so
+    no other paragraph needs to be looked at. The parent and index of every node to pull up are
+    appended to pulled in document order, so they can be removed without searching for them in
+    their parent.
+    """
+
+    for index, n in enumerate(node.children):
+        n_depth = depth
+        if isinstance(n, nodes.field_list):
+            field_lists.append(n)
+            pulled.append((node, index))
+            n_depth = 3
+        elif isinstance(n, nodes.note):
+            if depth < 3:
+                notes.append(n)
+                pulled.append((node, index))
+                n_depth = 2
+        elif isinstance(n, nodes.warning):
+            if depth < 2:
+                warnings.append(n)
+                pulled.append((node, index))
+                n_depth = 1
+        elif isinstance(n, nodes.paragraph) and depth == 0 and isinstance(node, nodes.paragraph):
+            paragraphs.append(n)
+        _collect_description_nodes(n, n_depth, field_lists, notes, warnings, paragraphs, pulled)
+
+
+def collapse_retvals(field_list: nodes.field_list) -> nodes.field_list:
+    """Returns the field list with the 'returns <value>' fields, that are used for retvals when
+    Sphinx doesn't support them, merged into a single 'returns' field listing all the values.
+    """
+
+    others: List[nodes.field] = []
+    retvals: List[nodes.field] = []
+    f: nodes.field
+    fn: nodes.field_name
+    fb: nodes.field_body
+    for f in field_list:
+        fn, fb = f
+        assert len(fn) == 1
+        if fn[0].astext().startswith("returns "):
+            retvals.append(f)
+        else:
+            others.append(f)
+    if len(retvals) == 0:
+        return field_list
+
+    items: List[nodes.paragraph] = []
+    for fn, fb in retvals:
+        val = nodes.strong("", fn[0].astext()[8:])
+        # assumption from visit_docparamlist: fb is a single paragraph or nothing
+        assert len(fb) <= 1, fb
+        bodyNodes = [val, nodes.Text(" -- ")]
+        if len(fb) == 1:
+            assert isinstance(fb[0], nodes.paragraph)
+            bodyNodes.extend(fb[0])
+        items.append(nodes.paragraph("", "", *bodyNodes))
+    # only make a bullet list if there are multiple retvals
+    body: Node
+    if len(items) == 1:
+        body = items[0]
+    else:
+        body = nodes.bullet_list()
+        for i in items:
+            body.append(nodes.list_item("", i))
+    fRetvals = nodes.field("", nodes.field_name("", "returns"), nodes.field_body("", body))
+    return nodes.field_list("", *others, fRetvals)
+
+
 class SphinxRenderer:
     """
     Doxygen node visitor that converts input into Sphinx/RST representation.
@@ -512,6 +742,18 @@ class SphinxRenderer:
         # Nesting level for lists.
         self.nesting_level = 0
 
+        # The config can't change while we render so look up what get_refid, the debug tracing and
+        # the per-node display options need only once
+        self.separate_member_pages = app.config.breathe_separate_member_pages
+        self.refid_prefix = project_info.name() if app.config.breathe_use_project_refids else None
+        self.trace_directives = app.config.breathe_debug_trace_directives
+        self.trace_doxygen_ids = app.config.breathe_debug_trace_doxygen_ids
+        self.trace_qualification = app.config.breathe_debug_trace_qualification
+        self.show_include = app.config.breathe_show_include
+        self.show_define_initializer = app.config.breathe_show_define_initializer
+        self.show_enumvalue_initializer = app.config.breathe_show_enumvalue_initializer
+        self.order_parameters_first = app.config.breathe_order_parameters_first
+
     def set_context(self, context: RenderContext) -> None:
         self.context = context
         if self.context.domain == "":
@@ -536,7 +778,7 @@ class SphinxRenderer:
             parts = refid.rsplit("_", 1)
             if len(parts) == 2 and parts[1].startswith("1"):
                 anchorid = parts[1][1:]
-                if len(anchorid) in set([33, 34]) and parts[0].endswith(anchorid):
+                if len(anchorid) in (33, 34) and parts[0].endswith(anchorid):
                     return parts[0][: -len(anchorid)] + parts[1]
                 elif len(anchorid) > 34:
                     index = 0
@@ -553,23 +795,16 @@ class SphinxRenderer:
         return refid
 
     def get_refid(self, refid: str) -> str:
-        if self.app.config.breathe_separate_member_pages:
+        if self.separate_member_pages:
             refid = self._fixup_separate_member_pages(refid)
-        if self.app.config.breathe_use_project_refids:
-            return "%s%s" % (self.project_info.name(), refid)
+        if self.refid_prefix is not None:
+            return "%s%s" % (self.refid_prefix, refid)
         else:
             return refid
 
     def get_domain(self) -> str:
         """Returns the domain for the current node."""
 
-        def get_filename(node) -> Optional[str]:
-            """Returns the name of a file where the declaration represented by node is located."""
-            try:
-                return node.location.file
-            except AttributeError:
-                return None
-
         self.context = cast(RenderContext, self.context)
         node_stack = self.context.node_stack
         node = node_stack[0]
@@ -597,36 +832,38 @@ class SphinxRenderer:
         assert issubclass(type(directive), BaseObject)
         directive.breathe_content_callback = contentCallback  # type: ignore
 
+        # The directive shares its options with the Breathe directive (directive_args[2]).
         # Translate Breathe's no-link option into the standard noindex option.
-        if "no-link" in self.context.directive_args[2]:
-            directive.options["noindex"] = True
+        directive_options = directive.options
+        if "no-link" in directive_options:
+            directive_options["noindex"] = True
+        # TODO: the directive_args seems to be reused between different run_directives
+        #       so for now, set the options only for this run and restore the previous values
+        #       afterwards. Remove this once the args are given in a different manner.
+        saved_options = {}
         for k, v in options.items():
-            directive.options[k] = v
+            saved_options[k] = directive_options.get(k, _missing)
+            directive_options[k] = v
 
-        assert self.app.env is not None
-        config = self.app.env.config
-
-        if config.breathe_debug_trace_directives:
+        if self.trace_directives:
             global _debug_indent
             print(
-                "{}Running directive: .. {}:: {}".format(
-                    "  " * _debug_indent, directive.name, declaration
-                )
+                "{}Running directive: .. {}:: {}".format(_debug_indent, directive.name, declaration)
             )
-            _debug_indent += 1
+            _debug_indent += "  "
 
         self.nesting_level += 1
-        nodes = directive.run()
-        self.nesting_level -= 1
-
-        # TODO: the directive_args seems to be reused between different run_directives
-        #       so for now, reset the options.
-        #       Remove this once the args are given in a different manner.
-        for k, v in options.items():
-            del directive.options[k]
-
-        if config.breathe_debug_trace_directives:
-            _debug_indent -= 1
+        try:
+            nodes = directive.run()
+        finally:
+            self.nesting_level -= 1
+            for k, v in saved_options.items():
+                if v is _missing:
+                    del directive_options[k]
+                else:
+                    directive_options[k] = v
+            if self.trace_directives:
+                _debug_indent = _debug_indent[:-2]
 
         # Filter out outer class names if we are rendering a member as a part of a class content.
         # In some cases of errors with a declaration there are no nodes
@@ -634,13 +871,8 @@ class SphinxRenderer:
         # If there are nodes, there should be at least 2.
         if len(nodes) != 0:
             assert len(nodes) >= 2, nodes
-            rst_node = nodes[1]
-            finder = NodeFinder(rst_node.document)
-            rst_node.walk(finder)
-
-            signode = finder.declarator
-
             if self.context.child:
+                signode = find_declarator(nodes[1])
                 signode.children = [n for n in signode.children if not n.tagname == "desc_addname"]
         return nodes
 
@@ -666,13 +898,12 @@ class SphinxRenderer:
         declaration = declaration.replace("\n", " ")
         nodes_ = self.run_directive(obj_type, declaration, content_callback, options)
 
-        assert self.app.env is not None
-        if self.app.env.config.breathe_debug_trace_doxygen_ids:
+        if self.trace_doxygen_ids:
             target = self.create_doxygen_target(node)
             if len(target) == 0:
-                print("{}Doxygen target: (none)".format("  " * _debug_indent))
+                print("{}Doxygen target: (none)".format(_debug_indent))
             else:
-                print("{}Doxygen target: {}".format("  " * _debug_indent, target[0]["ids"]))
+                print("{}Doxygen target: {}".format(_debug_indent, target[0]["ids"]))
 
         # <desc><desc_signature> and then one or more <desc_signature_line>
         # each <desc_signature_line> has a sphinx_line_type which hints what is present in that line
@@ -699,13 +930,12 @@ class SphinxRenderer:
         assert declarator is not None
         if display_obj_type is not None:
             n = declarator[0]
-            newStyle = True
-            # the new style was introduced in Sphinx v4
-            if sphinx.version_info[0] < 4:
-                newStyle = False
-            # but only for the C and C++ domains
-            if self.get_domain() and self.get_domain() not in ("c", "cpp"):
-                newStyle = False
+            newStyle = _new_style_obj_type
+            if newStyle:
+                # but only for the C and C++ domains
+                domain = self.get_domain()
+                if domain and domain not in ("c", "cpp"):
+                    newStyle = False
             if newStyle:
                 assert isinstance(n, addnodes.desc_sig_keyword)
                 declarator[0] = addnodes.desc_sig_keyword(display_obj_type, display_obj_type)
@@ -714,41 +944,30 @@ class SphinxRenderer:
                 assert n.astext()[-1] == " "
                 txt = display_obj_type + " "
                 declarator[0] = addnodes.desc_annotation(txt, txt)
-        if not self.app.env.config.breathe_debug_trace_doxygen_ids:
+        if not self.trace_doxygen_ids:
             target = self.create_doxygen_target(node)
         declarator.insert(0, target)
         if declarator_callback:
             declarator_callback(declarator)
         return nodes_
 
-    def get_qualification(self) -> List[str]:
-        if self.nesting_level > 0:
-            return []
-
-        assert self.app.env is not None
-        config = self.app.env.config
-        if config.breathe_debug_trace_qualification:
-
-            def debug_print_node(n):
-                return "node_type={}".format(n.node_type)
+    @staticmethod
+    def _collect_scope_names(node_stack, names: List[str], trace_indent: Optional[str] = None):
+        """Appends the names of the scopes found in the node stack to names, innermost first.
 
-            global _debug_indent
-            print(
-                "{}{}".format(_debug_indent * "  ", debug_print_node(self.qualification_stack[0]))
-            )
-            _debug_indent += 1
+        Returns the first node if it is a ref, in which case names is left untouched, as the
+        reference already carries the full name. Otherwise returns None.
+        """
 
-        names: List[str] = []
-        for node in self.qualification_stack[1:]:
-            if config.breathe_debug_trace_qualification:
-                print("{}{}".format(_debug_indent * "  ", debug_print_node(node)))
-            if node.node_type == "ref" and len(names) == 0:
-                if config.breathe_debug_trace_qualification:
-                    print("{}{}".format(_debug_indent * "  ", "res="))
-                return []
+        for node in node_stack:
+            if trace_indent is not None:
+                print("{}node_type={}".format(trace_indent, node.node_type))
+            node_type = node.node_type
+            if node_type == "ref" and len(names) == 0:
+                return node
             if (
-                node.node_type == "compound" and node.kind not in ["file", "namespace", "group"]
-            ) or node.node_type == "memberdef":
+                node_type == "compound" and node.kind not in _unqualified_compound_kinds
+            ) or node_type == "memberdef":
                 # We skip the 'file' entries because the file name doesn't form part of the
                 # qualified name for the identifier. We skip the 'namespace' entries because if we
                 # find an object through the namespace 'compound' entry in the index.xml then we'll
@@ -756,19 +975,51 @@ class SphinxRenderer:
                 # need the 'compounddef' entry because if we find the object through the 'file'
                 # entry in the index.xml file then we need to get the namespace name from somewhere
                 names.append(node.name)
-            if node.node_type == "compounddef" and node.kind == "namespace":
+            if node_type == "compounddef" and node.kind == "namespace":
                 # Nested namespaces include their parent namespace(s) in compoundname. ie,
                 # compoundname is 'foo::bar' instead of just 'bar' for namespace 'bar' nested in
                 # namespace 'foo'. We need full compoundname because node_stack doesn't necessarily
                 # include parent namespaces and we stop here in case it does.
                 names.extend(reversed(node.compoundname.split("::")))
                 break
+        return None
 
-        names.reverse()
+    def get_qualification(self) -> List[str]:
+        if self.nesting_level > 0:
+            return []
 
-        if config.breathe_debug_trace_qualification:
-            print("{}res={}".format(_debug_indent * "  ", names))
-            _debug_indent -= 1
+        trace = self.trace_qualification
+        indent = None
+        if trace:
+            global _debug_indent
+            print("{}node_type={}".format(_debug_indent, self.qualification_stack[0].node_type))
+            _debug_indent += "  "
+            indent = _debug_indent
+
+        names: List[str] = []
+        if self._collect_scope_names(self.qualification_stack[1:], names, indent) is not None:
+            names = []
+            if trace:
+                print("{}{}".format(indent, "res="))
+        else:
+            names.reverse()
+            if trace:
+                print("{}res={}".format(indent, names))
+        if trace:
+            _debug_indent = _debug_indent[:-2]
+        return names
+
+    def get_compound_qualification(self, nodeDef) -> List[str]:
+        """Returns the qualification followed by the name components of the compound. Nested
+        compounds are rendered in the scope of their parent, so only get their own name."""
+
+        names = self.get_qualification()
+        # TODO: this breaks if it's a template specialization
+        #       and one of the arguments contain '::'
+        if self.nesting_level == 0:
+            names.extend(nodeDef.compoundname.split("::"))
+        else:
+            names.append(nodeDef.compoundname.rpartition("::")[2])
         return names
 
     # ===================================================================================
@@ -776,41 +1027,21 @@ class SphinxRenderer:
     def get_fully_qualified_name(self):
 
         names = []
-        node_stack = self.context.node_stack
-        node = node_stack[0]
+        node = self.context.node_stack[0]
 
         # If the node is a namespace, use its name because namespaces are skipped in the main loop.
         if node.node_type == "compound" and node.kind == "namespace":
             names.append(node.name)
 
-        for node in node_stack:
-            if node.node_type == "ref" and len(names) == 0:
-                return node.valueOf_
-            if (
-                node.node_type == "compound" and node.kind not in ["file", "namespace", "group"]
-            ) or node.node_type == "memberdef":
-                # We skip the 'file' entries because the file name doesn't form part of the
-                # qualified name for the identifier. We skip the 'namespace' entries because if we
-                # find an object through the namespace 'compound' entry in the index.xml then we'll
-                # also have the 'compounddef' entry in our node stack and we'll get it from that. We
-                # need the 'compounddef' entry because if we find the object through the 'file'
-                # entry in the index.xml file then we need to get the namespace name from somewhere
-                names.insert(0, node.name)
-            if node.node_type == "compounddef" and node.kind == "namespace":
-                # Nested namespaces include their parent namespace(s) in compoundname. ie,
-                # compoundname is 'foo::bar' instead of just 'bar' for namespace 'bar' nested in
-                # namespace 'foo'. We need full compoundname because node_stack doesn't necessarily
-                # include parent namespaces and we stop here in case it does.
-                names.insert(0, node.compoundname)
-                break
-
-        return "::".join(names)
+        ref = self._collect_scope_names(self.context.node_stack, names)
+        if ref is not None:
+            return ref.valueOf_
+        return "::".join(reversed(names))
 
     def create_template_prefix(self, decl) -> str:
         if not decl.templateparamlist:
             return ""
-        nodes = self.render(decl.templateparamlist)
-        return "template<" + "".join(n.astext() for n in nodes) + ">"
+        return "template<" + self.render_text(decl.templateparamlist) + ">"
 
     def run_domain_directive(self, kind, names):
         domain_directive = DomainDirectiveFactory.create(
@@ -821,29 +1052,24 @@ class SphinxRenderer:
         if "no-link" in self.context.directive_args[2]:
             domain_directive.options["noindex"] = True
 
-        config = self.app.env.config
-        if config.breathe_debug_trace_directives:
+        if self.trace_directives:
             global _debug_indent
             print(
                 "{}Running directive (old): .. {}:: {}".format(
-                    "  " * _debug_indent, domain_directive.name, "".join(names)
+                    _debug_indent, domain_directive.name, "".join(names)
                 )
             )
-            _debug_indent += 1
-
-        nodes = domain_directive.run()
+            _debug_indent += "  "
 
-        if config.breathe_debug_trace_directives:
-            _debug_indent -= 1
+        try:
+            nodes = domain_directive.run()
+        finally:
+            if self.trace_directives:
+                _debug_indent = _debug_indent[:-2]
 
         # Filter out outer class names if we are rendering a member as a part of a class content.
-        rst_node = nodes[1]
-        finder = NodeFinder(rst_node.document)
-        rst_node.walk(finder)
-
-        signode = finder.declarator
-
         if len(names) > 0 and self.context.child:
+            signode = find_declarator(nodes[1])
             signode.children = [n for n in signode.children if not n.tagname == "desc_addname"]
         return nodes
 
@@ -878,23 +1104,21 @@ class SphinxRenderer:
         fieldLists: List[nodes.field_list] = []
         admonitions: List[Node] = []
 
-        def pullup(node, typ, dest):
-            for n in node.traverse(typ):
-                del n.parent[n.parent.index(n)]
-                dest.append(n)
-
         detailed = []
         for candNode in detailedCand:
-            pullup(candNode, nodes.field_list, fieldLists)
-            pullup(candNode, nodes.note, admonitions)
-            pullup(candNode, nodes.warning, admonitions)
+            notes: List[Node] = []
+            warnings: List[Node] = []
+            paragraphs: List[nodes.paragraph] = []
+            pulled: List[Tuple[nodes.Element, int]] = []
+            _collect_description_nodes(candNode, 0, fieldLists, notes, warnings, paragraphs, pulled)
+            # Going backwards removes later siblings first, so the recorded indices stay valid
+            for parent, index in reversed(pulled):
+                del parent[index]
+            admonitions.extend(notes)
+            admonitions.extend(warnings)
             # and collapse paragraphs
-            for para in candNode.traverse(nodes.paragraph):
-                if (
-                    para.parent
-                    and len(para.parent) == 1
-                    and isinstance(para.parent, nodes.paragraph)
-                ):
+            for para in paragraphs:
+                if len(para.parent) == 1:
                     para.replace_self(para.children)
 
             # and remove empty top-level paragraphs
@@ -910,47 +1134,10 @@ class SphinxRenderer:
             fieldLists = [fieldList]
 
         # collapse retvals into a single return field
-        if len(fieldLists) != 0 and sphinx.version_info[0:2] < (4, 3):
-            others: List[nodes.field] = []
-            retvals: List[nodes.field] = []
-            f: nodes.field
-            fn: nodes.field_name
-            fb: nodes.field_body
-            for f in fieldLists[0]:
-                fn, fb = f
-                assert len(fn) == 1
-                if fn.astext().startswith("returns "):
-                    retvals.append(f)
-                else:
-                    others.append(f)
-            if len(retvals) != 0:
-                items: List[nodes.paragraph] = []
-                for fn, fb in retvals:
-                    # we created the retvals before, so we made this prefix
-                    assert fn.astext().startswith("returns ")
-                    val = nodes.strong("", fn.astext()[8:])
-                    # assumption from visit_docparamlist: fb is a single paragraph or nothing
-                    assert len(fb) <= 1, fb
-                    bodyNodes = [val, nodes.Text(" -- ")]
-                    if len(fb) == 1:
-                        assert isinstance(fb[0], nodes.paragraph)
-                        bodyNodes.extend(fb[0])
-                    items.append(nodes.paragraph("", "", *bodyNodes))
-                # only make a bullet list if there are multiple retvals
-                body: Node
-                if len(items) == 1:
-                    body = items[0]
-                else:
-                    body = nodes.bullet_list()
-                    for i in items:
-                        body.append(nodes.list_item("", i))
-                fRetvals = nodes.field(
-                    "", nodes.field_name("", "returns"), nodes.field_body("", body)
-                )
-                fl = nodes.field_list("", *others, fRetvals)
-                fieldLists = [fl]
+        if len(fieldLists) != 0 and not _sphinx_has_retval_field:
+            fieldLists = [collapse_retvals(fieldLists[0])]
 
-        if self.app.config.breathe_order_parameters_first:
+        if self.order_parameters_first:
             return detailed + fieldLists + admonitions
         else:
             return detailed + admonitions + fieldLists
@@ -971,26 +1158,23 @@ class SphinxRenderer:
         if obj_type is None:
             obj_type = node.kind
         nodes = self.run_domain_directive(obj_type, [declaration.replace("\n", " ")])
-        if self.app.env.config.breathe_debug_trace_doxygen_ids:
+        if self.trace_doxygen_ids:
             target = self.create_doxygen_target(node)
             if len(target) == 0:
-                print("{}Doxygen target (old): (none)".format("  " * _debug_indent))
+                print("{}Doxygen target (old): (none)".format(_debug_indent))
             else:
-                print("{}Doxygen target (old): {}".format("  " * _debug_indent, target[0]["ids"]))
+                print("{}Doxygen target (old): {}".format(_debug_indent, target[0]["ids"]))
 
         rst_node = nodes[1]
-        finder = NodeFinder(rst_node.document)
-        rst_node.walk(finder)
-
-        signode = finder.declarator
-        contentnode = finder.content
+        signode = find_declarator(rst_node)
+        contentnode = find_content(rst_node)
 
         update_signature = kwargs.get("update_signature", None)
         if update_signature is not None:
             update_signature(signode, obj_type)
         if description is None:
             description = self.description(node)
-        if not self.app.env.config.breathe_debug_trace_doxygen_ids:
+        if not self.trace_doxygen_ids:
             target = self.create_doxygen_target(node)
         signode.insert(0, target)
         contentnode.extend(description)
@@ -1017,19 +1201,11 @@ class SphinxRenderer:
         new_context = parent_context.create_child_context(nodeDef)
 
         with WithContext(self, new_context):
-            names = self.get_qualification()
-            if self.nesting_level == 0:
-                names.extend(nodeDef.compoundname.split("::"))
-            else:
-                names.append(nodeDef.compoundname.split("::")[-1])
+            names = self.get_compound_qualification(nodeDef)
             declaration = self.join_nested_name(names)
 
             def content(contentnode):
-                if nodeDef.includes:
-                    for include in nodeDef.includes:
-                        contentnode.extend(
-                            self.render(include, new_context.create_child_context(include))
-                        )
+                contentnode.extend(self.render_includes(nodeDef.includes, new_context))
                 rendered_data = self.render(file_data, parent_context)
                 contentnode.extend(rendered_data)
 
@@ -1053,39 +1229,20 @@ class SphinxRenderer:
             kind = nodeDef.kind
             # Defer to domains specific directive.
 
-            names = self.get_qualification()
-            # TODO: this breaks if it's a template specialization
-            #       and one of the arguments contain '::'
-            if self.nesting_level == 0:
-                names.extend(nodeDef.compoundname.split("::"))
-            else:
-                names.append(nodeDef.compoundname.split("::")[-1])
-            decls = [
+            names = self.get_compound_qualification(nodeDef)
+            declaration = "%s %s" % (
                 self.create_template_prefix(nodeDef),
                 self.join_nested_name(names),
-            ]
+            )
             # add base classes
             if len(nodeDef.basecompoundref) != 0:
-                decls.append(":")
-            first = True
-            for base in nodeDef.basecompoundref:
-                if not first:
-                    decls.append(",")
-                else:
-                    first = False
-                if base.prot is not None and domain != "cs":
-                    decls.append(base.prot)
-                if base.virt == "virtual":
-                    decls.append("virtual")
-                decls.append(base.content_[0].value)
-            declaration = " ".join(decls)
+                declaration += " : " + " , ".join(
+                    get_base_decl(base, with_prot=domain != "cs")
+                    for base in nodeDef.basecompoundref
+                )
 
             def content(contentnode) -> None:
-                if nodeDef.includes:
-                    for include in nodeDef.includes:
-                        contentnode.extend(
-                            self.render(include, new_context.create_child_context(include))
-                        )
+                contentnode.extend(self.render_includes(nodeDef.includes, new_context))
                 rendered_data = self.render(file_data, parent_context)
                 contentnode.extend(rendered_data)
 
@@ -1114,19 +1271,11 @@ class SphinxRenderer:
         with WithContext(self, new_context):
             # Pretend that the signature is being rendered in context of the
             # definition, for proper domain detection
-            names = self.get_qualification()
-            if self.nesting_level == 0:
-                names.extend(nodeDef.compoundname.split("::"))
-            else:
-                names.append(nodeDef.compoundname.split("::")[-1])
+            names = self.get_compound_qualification(nodeDef)
             declaration = self.join_nested_name(names)
 
             def content(contentnode):
-                if nodeDef.includes:
-                    for include in nodeDef.includes:
-                        contentnode.extend(
-                            self.render(include, new_context.create_child_context(include))
-                        )
+                contentnode.extend(self.render_includes(nodeDef.includes, new_context))
                 rendered_data = self.render(file_data, parent_context)
                 contentnode.extend(rendered_data)
 
@@ -1173,15 +1322,7 @@ class SphinxRenderer:
 
             # add base classes
             if kind in ("class", "struct"):
-                bs = []
-                for base in file_data.compounddef.basecompoundref:
-                    b = []
-                    if base.prot is not None:
-                        b.append(base.prot)
-                    if base.virt == "virtual":
-                        b.append("virtual")
-                    b.append(base.content_[0].value)
-                    bs.append(" ".join(b))
+                bs = [get_base_decl(base) for base in file_data.compounddef.basecompoundref]
                 if len(bs) != 0:
                     arg += " : "
                     arg += ", ".join(bs)
@@ -1191,16 +1332,13 @@ class SphinxRenderer:
             nodes = self.run_domain_directive(kind, self.context.directive_args[1])
             rst_node = nodes[1]
 
-            finder = NodeFinder(rst_node.document)
-            rst_node.walk(finder)
-
             if kind in ("interface", "namespace"):
                 # This is not a real C++ declaration type that Sphinx supports,
                 # so we hax the replacement of it.
-                finder.declarator[0] = addnodes.desc_annotation(kind + " ", kind + " ")
+                find_declarator(rst_node)[0] = addnodes.desc_annotation(kind + " ", kind + " ")
 
             rst_node.children[0].insert(0, doxygen_target)
-            return nodes, finder.content
+            return nodes, find_content(rst_node)
 
         refid = self.get_refid(node.refid)
         render_sig = kwargs.get("render_signature", render_signature)
@@ -1211,9 +1349,7 @@ class SphinxRenderer:
                 file_data, self.target_handler.create_target(refid), name, kind
             )
 
-        if file_data.compounddef.includes:
-            for include in file_data.compounddef.includes:
-                contentnode.extend(self.render(include, new_context.create_child_context(include)))
+        contentnode.extend(self.render_includes(file_data.compounddef.includes, new_context))
 
         contentnode.extend(rendered_data)
         return nodes
@@ -1244,7 +1380,7 @@ class SphinxRenderer:
 
             rst_node.document = self.state.document
             rst_node["objtype"] = kind
-            rst_node["domain"] = self.get_domain() if self.get_domain() else "cpp"
+            rst_node["domain"] = self.get_domain() or "cpp"
 
             contentnode = addnodes.desc_content()
             rst_node.append(contentnode)
@@ -1302,19 +1438,24 @@ class SphinxRenderer:
     def visit_compounddef(self, node) -> List[Node]:
         self.context = cast(RenderContext, self.context)
         options = self.context.directive_args[2]
+        # Without a sections option the parts are output in the order they are added, otherwise
+        # they are collected per entry of the option and output in that order.
+        nodelist: List[Node] = []
         section_order = None
+        section_nodes: List[List[Node]] = []
         if "sections" in options:
-            section_order = {sec: i for i, sec in enumerate(options["sections"].split(" "))}
+            sections = options["sections"].split(" ")
+            section_order = {sec: i for i, sec in enumerate(sections)}
+            section_nodes = [[] for _ in sections]
         membergroup_order = None
         if "membergroups" in options:
             membergroup_order = {sec: i for i, sec in enumerate(options["membergroups"].split(" "))}
-        nodemap: Dict[int, List[Node]] = {}
 
         def addnode(kind, lam):
             if section_order is None:
-                nodemap[len(nodemap)] = lam()
+                nodelist.extend(lam())
             elif kind in section_order:
-                nodemap.setdefault(section_order[kind], []).extend(lam())
+                section_nodes[section_order[kind]].extend(lam())
 
         if "members-only" not in options:
             if "allow-dot-graphs" in options:
@@ -1370,27 +1511,29 @@ class SphinxRenderer:
             # entries together
             section_nodelists.setdefault(kind, []).append(rst_node)
 
-        # Order the results in an appropriate manner
-        for kind, _ in self.sections:
-            addnode(kind, lambda: section_nodelists.get(kind, []))
+        # Order the results in an appropriate manner, most compounds only have a few of the kinds
+        for kind in self.section_kinds:
+            if kind in section_nodelists:
+                addnode(kind, lambda: section_nodelists[kind])
 
         # Take care of innerclasses
         addnode("innerclass", lambda: self.render_iterable(node.innerclass))
         addnode("innernamespace", lambda: self.render_iterable(node.innernamespace))
 
-        if "inner" in options:
+        # addnode only renders the kinds the sections option asks for, but don't even parse the
+        # inner groups if they aren't wanted
+        if "inner" in options and (section_order is None or "innergroup" in section_order):
             for node in node.innergroup:
                 file_data = self.compound_parser.parse(node.refid)
                 inner = file_data.compounddef
                 addnode("innergroup", lambda: self.visit_compounddef(inner))
 
-        nodelist = []
-        for _, nodes_ in sorted(nodemap.items()):
-            nodelist += nodes_
-
+        if section_order is not None:
+            nodelist = list(itertools.chain.from_iterable(section_nodes))
         return nodelist
 
     section_titles = dict(sections)
+    section_kinds = tuple(section_titles)
 
     def visit_sectiondef(self, node) -> List[Node]:
         self.context = cast(RenderContext, self.context)
@@ -1556,23 +1699,21 @@ class SphinxRenderer:
         nodelist = self.render_iterable(node.content_)
         return [nodes.reference("", "", refuri=node.url, *nodelist)]
 
+    markup_creators: Dict[str, Type[TextElement]] = {
+        "emphasis": nodes.emphasis,
+        "computeroutput": nodes.literal,
+        "bold": nodes.strong,
+        "superscript": nodes.superscript,
+        "subscript": nodes.subscript,
+    }
+
     def visit_docmarkup(self, node) -> List[Node]:
         nodelist = self.render_iterable(node.content_)
-        creator: Type[TextElement] = nodes.inline
-        if node.type_ == "emphasis":
-            creator = nodes.emphasis
-        elif node.type_ == "computeroutput":
-            creator = nodes.literal
-        elif node.type_ == "bold":
-            creator = nodes.strong
-        elif node.type_ == "superscript":
-            creator = nodes.superscript
-        elif node.type_ == "subscript":
-            creator = nodes.subscript
-        elif node.type_ == "center":
-            print("Warning: does not currently handle 'center' text display")
-        elif node.type_ == "small":
-            print("Warning: does not currently handle 'small' text display")
+        creator = self.markup_creators.get(node.type_)
+        if creator is None:
+            creator = nodes.inline
+            if node.type_ in ("center", "small"):
+                print("Warning: does not currently handle '%s' text display" % node.type_)
         return [creator("", "", *nodelist)]
 
     def visit_docsectN(self, node) -> List[Node]:
@@ -1693,23 +1834,22 @@ class SphinxRenderer:
                 0,
                 node,
                 match_titles=1,
-                state_machine_kwargs={
-                    "state_classes": (InlineText,),
-                    "initial_state": "InlineText",
-                },
+                state_machine_kwargs=_inline_state_machine_kwargs,
             )
         finally:
             self.state.memo.title_styles = surrounding_title_styles
             self.state.memo.section_level = surrounding_section_level
 
     def visit_verbatim(self, node) -> List[Node]:
-        if not node.text.strip().startswith("embed:rst"):
+        embed = _embed_rst_re.match(node.text)
+        if embed is None:
             # Remove trailing new lines. Purely subjective call from viewing results
             text = node.text.rstrip()
 
             # Handle has a preformatted text
             return [nodes.literal_block(text, text)]
 
+        variant = embed.group(1)
         is_inline = False
 
         # do we need to strip leading asterisks?
@@ -1717,36 +1857,30 @@ class SphinxRenderer:
         #   However This would have a side-effect for any users who have an rst-block
         #   consisting of a simple bullet list.
         #   For now we just look for an extended embed tag
-        if node.text.strip().startswith("embed:rst:leading-asterisk"):
-            lines = node.text.splitlines()
+        if variant == "leading-asterisk":
             # Replace the first * on each line with a blank space
-            lines = map(lambda text: text.replace("*", " ", 1), lines)
-            node.text = "\n".join(lines)
+            lines = [line.replace("*", " ", 1) for line in node.text.splitlines()]
 
         # do we need to strip leading ///?
-        elif node.text.strip().startswith("embed:rst:leading-slashes"):
-            lines = node.text.splitlines()
+        elif variant == "leading-slashes":
             # Replace the /// on each line with three blank spaces
-            lines = map(lambda text: text.replace("///", "   ", 1), lines)
-            node.text = "\n".join(lines)
+            lines = [line.replace("///", "   ", 1) for line in node.text.splitlines()]
 
-        elif node.text.strip().startswith("embed:rst:inline"):
+        elif variant == "inline":
             # Inline all text inside the verbatim
-            node.text = "".join(node.text.splitlines())
+            lines = ["".join(node.text.splitlines()).replace("embed:rst:inline", "", 1)]
             is_inline = True
 
-        if is_inline:
-            text = node.text.replace("embed:rst:inline", "", 1)
         else:
-            # Remove the first line which is "embed:rst[:leading-asterisk]"
-            text = "\n".join(node.text.split("\n")[1:])
+            lines = node.text.split("\n")
 
-            # Remove starting whitespace
-            text = textwrap.dedent(text)
+        if not is_inline:
+            # Remove the first line which is "embed:rst[:leading-asterisk]" and starting whitespace
+            lines = textwrap.dedent("\n".join(lines[1:])).split("\n")
 
         # Inspired by autodoc.py in Sphinx
         rst = StringList()
-        for line in text.split("\n"):
+        for line in lines:
             rst.append(line, "<breathe>")
 
         # Parent node for the generated node subtree
@@ -1766,7 +1900,7 @@ class SphinxRenderer:
         return [rst_node]
 
     def visit_inc(self, node: compoundsuper.incType) -> List[Node]:
-        if not self.app.config.breathe_show_include:
+        if not self.show_include:
             return []
 
         compound_link: List[Node] = [nodes.Text(node.content_[0].getValue())]
@@ -1794,7 +1928,7 @@ class SphinxRenderer:
         nodelist = self.render_iterable(node.para)
         return [nodes.list_item("", *nodelist)]
 
-    numeral_kind = ["arabic", "loweralpha", "lowerroman", "upperalpha", "upperroman"]
+    numeral_kind = ("arabic", "loweralpha", "lowerroman", "upperalpha", "upperroman")
 
     def render_unordered(self, children) -> List[Node]:
         nodelist_list = nodes.bullet_list("", *children)
@@ -1802,8 +1936,8 @@ class SphinxRenderer:
 
     def render_enumerated(self, children, nesting_level) -> List[Node]:
         nodelist_list = nodes.enumerated_list("", *children)
-        idx = nesting_level % len(SphinxRenderer.numeral_kind)
-        nodelist_list["enumtype"] = SphinxRenderer.numeral_kind[idx]
+        numeral_kind = SphinxRenderer.numeral_kind
+        nodelist_list["enumtype"] = numeral_kind[nesting_level % len(numeral_kind)]
         nodelist_list["prefix"] = ""
         nodelist_list["suffix"] = "."
         return [nodelist_list]
@@ -1820,8 +1954,10 @@ class SphinxRenderer:
             return self.render_unordered(children=val)
         elif node.node_subtype == "ordered":
             self.nesting_level += 1
-            val = self.render_iterable(node.listitem)
-            self.nesting_level -= 1
+            try:
+                val = self.render_iterable(node.listitem)
+            finally:
+                self.nesting_level -= 1
             return self.render_enumerated(children=val, nesting_level=self.nesting_level)
         return []
 
@@ -1865,18 +2001,18 @@ class SphinxRenderer:
 
         descnode = addnodes.desc()
         descnode["objtype"] = "xrefsect"
-        descnode["domain"] = self.get_domain() if self.get_domain() else "cpp"
-        descnode += signode
-        descnode += contentnode
+        descnode["domain"] = self.get_domain() or "cpp"
+        descnode.extend((signode, contentnode))
 
         return [descnode]
 
     def visit_docvariablelist(self, node) -> List[Node]:
         output: List[Node] = []
+        domain = self.get_domain() or "cpp"
         for varlistentry, listitem in zip(node.varlistentries, node.listitems):
             descnode = addnodes.desc()
             descnode["objtype"] = "varentry"
-            descnode["domain"] = self.get_domain() if self.get_domain() else "cpp"
+            descnode["domain"] = domain
             signode = addnodes.desc_signature()
             signode += self.render_optional(varlistentry)
             descnode += signode
@@ -1920,10 +2056,7 @@ class SphinxRenderer:
         table = nodes.table()
         table["classes"] += ["colwidths-auto"]
         tgroup = nodes.tgroup(cols=node.cols)
-        for _ in range(node.cols):
-            colspec = nodes.colspec()
-            colspec.attributes["colwidth"] = "auto"
-            tgroup += colspec
+        tgroup.extend([nodes.colspec(colwidth="auto") for _ in range(node.cols)])
         table += tgroup
         rows = self.render_iterable(node.row)
 
@@ -1931,7 +2064,7 @@ class SphinxRenderer:
         # "envelop" rows there, namely thead and tbody (eg it will need to be updated
         # if Doxygen one day adds support for tfoot)
 
-        tags: Dict[str, List] = {row.starttag(): [] for row in rows}
+        tags: Dict[str, List] = collections.defaultdict(list)
         for row in rows:
             tags[row.starttag()].append(row.next_node())
 
@@ -1942,8 +2075,9 @@ class SphinxRenderer:
 
         for klass in [nodes.thead, nodes.tbody]:
             obj = klass()
-            if obj.starttag() in tags:
-                merge_row_types(tgroup, obj, tags[obj.starttag()])
+            elems = tags.get(obj.starttag())
+            if elems is not None:
+                merge_row_types(tgroup, obj, elems)
 
         return [table]
 
@@ -1968,7 +2102,7 @@ class SphinxRenderer:
                 declaration = " ".join(
                     [
                         self.create_template_prefix(node),
-                        "".join(n.astext() for n in self.render(node.get_type())),
+                        self.render_text(node.get_type()),
                         name,
                         node.get_argsstring(),
                     ]
@@ -1987,7 +2121,7 @@ class SphinxRenderer:
                     elements.append("explicit")
                 # TODO: handle constexpr when parser has been updated
                 #       but Doxygen seems to leave it in the type anyway
-                typ = "".join(n.astext() for n in self.render(node.get_type()))
+                typ = self.render_text(node.get_type())
                 # Doxygen sometimes leaves 'static' in the type,
                 # e.g., for "constexpr static auto f()"
                 typ = typ.replace("static ", "")
@@ -2038,27 +2172,20 @@ class SphinxRenderer:
 
             nodes = self.run_domain_directive(node.kind, self.context.directive_args[1])
 
-            assert self.app.env is not None
-            if self.app.env.config.breathe_debug_trace_doxygen_ids:
-                target = self.create_doxygen_target(node)
+            target = self.create_doxygen_target(node)
+            if self.trace_doxygen_ids:
                 if len(target) == 0:
-                    print("{}Doxygen target (old): (none)".format("  " * _debug_indent))
+                    print("{}Doxygen target (old): (none)".format(_debug_indent))
                 else:
-                    print(
-                        "{}Doxygen target (old): {}".format("  " * _debug_indent, target[0]["ids"])
-                    )
+                    print("{}Doxygen target (old): {}".format(_debug_indent, target[0]["ids"]))
 
             rst_node = nodes[1]
-            finder = NodeFinder(rst_node.document)
-            rst_node.walk(finder)
 
             # Templates have multiple signature nodes in recent versions of Sphinx.
             # Insert Doxygen target into the first signature node.
-            if not self.app.env.config.breathe_debug_trace_doxygen_ids:
-                target = self.create_doxygen_target(node)
             rst_node.children[0].insert(0, target)
 
-            finder.content.extend(self.description(node))
+            find_content(rst_node).extend(self.description(node))
             return nodes
 
     def visit_define(self, node) -> List[Node]:
@@ -2073,7 +2200,7 @@ class SphinxRenderer:
 
         # TODO: remove this once Sphinx supports definitions for macros
         def add_definition(declarator: Declarator) -> None:
-            if node.initializer and self.app.config.breathe_show_define_initializer:
+            if node.initializer and self.show_define_initializer:
                 declarator.append(nodes.Text(" "))
                 declarator.extend(self.render(node.initializer))
 
@@ -2097,7 +2224,7 @@ class SphinxRenderer:
             # between 'enum class' and 'enum struct',
             # so render them both as 'enum class'.
             obj_type = "enum-class"
-            underlying_type = "".join(n.astext() for n in self.render(node.type_))
+            underlying_type = self.render_text(node.type_)
             if len(underlying_type.strip()) != 0:
                 declaration += " : "
                 declaration += underlying_type
@@ -2108,14 +2235,14 @@ class SphinxRenderer:
         )
 
     def visit_enumvalue(self, node) -> List[Node]:
-        if self.app.config.breathe_show_enumvalue_initializer:
+        if self.show_enumvalue_initializer:
             declaration = node.name + self.make_initializer(node)
         else:
             declaration = node.name
         return self.handle_declaration(node, declaration, obj_type="enumvalue")
 
     def visit_typedef(self, node) -> List[Node]:
-        type_ = "".join(n.astext() for n in self.render(node.get_type()))
+        type_ = self.render_text(node.get_type())
         names = self.get_qualification()
         names.append(node.get_name())
         name = self.join_nested_name(names)
@@ -2146,7 +2273,7 @@ class SphinxRenderer:
                     separator += "= "
                 signature.append(nodes.Text(separator))
             signature.extend(render_nodes)
-        return "".join(n.astext() for n in signature)
+        return _nodes_to_text(signature)
 
     def visit_variable(self, node) -> List[Node]:
         names = self.get_qualification()
@@ -2163,7 +2290,7 @@ class SphinxRenderer:
             declaration = " ".join(
                 [
                     self.create_template_prefix(node),
-                    "".join(n.astext() for n in self.render(node.get_type())),
+                    self.render_text(node.get_type()),
                     name,
                     node.get_argsstring(),
                 ]
@@ -2182,7 +2309,7 @@ class SphinxRenderer:
                 elements.append("static")
             if node.mutable == "yes":
                 elements.append("mutable")
-            typename = "".join(n.astext() for n in self.render(node.get_type()))
+            typename = self.render_text(node.get_type())
             # Doxygen sometimes leaves 'static' in the type,
             # e.g., for "constexpr static int i"
             typename = typename.replace("static ", "")
@@ -2204,11 +2331,11 @@ class SphinxRenderer:
 
         desc = addnodes.desc()
         desc["objtype"] = "friendclass"
-        desc["domain"] = self.get_domain() if self.get_domain() else "cpp"
+        desc["domain"] = dom or "cpp"
         signode = addnodes.desc_signature()
         desc += signode
 
-        typ = "".join(n.astext() for n in self.render(node.get_type()))
+        typ = self.render_text(node.get_type())
         # in Doxygen < 1.9 the 'friend' part is there, but afterwards not
         # https://github.com/michaeljones/breathe/issues/616
         assert typ in ("friend class", "friend struct", "class", "struct")
@@ -2234,45 +2361,32 @@ class SphinxRenderer:
             # Render keywords as annotations for consistency with the cpp domain.
             if len(type_nodes) > 0 and isinstance(type_nodes[0], str):
                 first_node = type_nodes[0]
-                for keyword in ["typename", "class"]:
+                for keyword in ("typename", "class"):
                     if first_node.startswith(keyword + " "):
-                        type_nodes[0] = nodes.Text(first_node.replace(keyword, "", 1))
+                        # keep the space, it separates the annotation from the rest of the type
+                        type_nodes[0] = nodes.Text(first_node[len(keyword) :])
                         type_nodes.insert(0, addnodes.desc_annotation(keyword, keyword))
                         break
             nodelist.extend(type_nodes)
 
         # Parameter name
         if node.declname:
-            dom = self.get_domain()
-            if not dom:
-                dom = "cpp"
             appendDeclName = True
-            if insertDeclNameByParsing:
-                if dom == "cpp" and sphinx.version_info >= (4, 1, 0):
-                    parser = cpp.DefinitionParser(
-                        "".join(n.astext() for n in nodelist),
-                        location=self.state.state_machine.get_source_and_line(),
-                        config=self.app.config,
+            # Only parsing needs the domain, so skip looking it up otherwise
+            if insertDeclNameByParsing and sphinx.version_info >= (4, 1, 0):
+                dom = self.get_domain()
+                if not dom or dom == "cpp":
+                    decl = _insert_template_param_name(
+                        _nodes_to_text(nodelist),
+                        node.declname,
+                        self.app.config,
+                        self.state.state_machine.get_source_and_line,
                     )
-                    try:
-                        # we really should use _parse_template_parameter()
-                        # but setting a name there is non-trivial, so we use type
-                        ast = parser._parse_type(named="single", outer="templateParam")
-                        assert ast.name is None
-                        nn = cpp.ASTNestedName(
-                            names=[
-                                cpp.ASTNestedNameElement(cpp.ASTIdentifier(node.declname), None)
-                            ],
-                            templates=[False],
-                            rooted=False,
-                        )
-                        ast.name = nn
+                    # parsing fails with "typename ...Args", so for now, just append
+                    if decl is not None:
                         # the actual nodes don't matter, as it is astext()-ed later
-                        nodelist = [nodes.Text(str(ast))]
+                        nodelist = [nodes.Text(decl)]
                         appendDeclName = False
-                    except cpp.DefinitionError:
-                        # happens with "typename ...Args", so for now, just append
-                        pass
 
             if appendDeclName:
                 if nodelist:
@@ -2306,19 +2420,20 @@ class SphinxRenderer:
         self.output_defname = True
         return nodelist
 
+    field_list_names = {
+        "param": "param",
+        "exception": "throws",
+        "templateparam": "tparam",
+        "retval": "retval" if _sphinx_has_retval_field else "returns",
+    }
+
     def visit_docparamlist(self, node) -> List[Node]:
         """Parameter/Exception/TemplateParameter documentation"""
 
-        fieldListName = {
-            "param": "param",
-            "exception": "throws",
-            "templateparam": "tparam",
-            # retval support available on Sphinx >= 4.3
-            "retval": "returns" if sphinx.version_info[0:2] < (4, 3) else "retval",
-        }
+        fieldListName = self.field_list_names
 
         # https://docutils.sourceforge.io/docs/ref/doctree.html#field-list
-        fieldList = nodes.field_list()
+        fields: List[nodes.field] = []
         for item in node.parameteritem:
             # TODO: does item.parameternamelist really have more than 1 parametername?
             assert len(item.parameternamelist) <= 1, item.parameternamelist
@@ -2340,7 +2455,7 @@ class SphinxRenderer:
                                 msg = "Doxygen \\exception commands with multiple names can not be"
                                 msg += " converted to a single :throws: field in Sphinx."
                                 msg += " Exception '{}' suppresed from output.".format(
-                                    "".join(n.astext() for n in thisName)
+                                    _nodes_to_text(thisName)
                                 )
                                 self.state.document.reporter.warning(msg)
                                 continue
@@ -2349,14 +2464,12 @@ class SphinxRenderer:
                         if len(content) == 2:
                             # note, each paramName node seems to have the same direction,
                             # so just use the last one
-                            dir = "".join(n.astext() for n in self.render(content[0])).strip()
+                            dir = self.render_text(content[0]).strip()
                             assert dir in ("[in]", "[out]", "[inout]"), ">" + dir + "<"
                             parameterDirectionNodes = [nodes.strong(dir, dir), nodes.Text(" ", " ")]
             # it seems that Sphinx expects the name to be a single node,
             # so let's make it that
-            txt = fieldListName[node.kind] + " "
-            for n in nameNodes:
-                txt += n.astext()
+            txt = fieldListName[node.kind] + " " + _nodes_to_text(nameNodes)
             name = nodes.field_name("", nodes.Text(txt))
             bodyNodes = self.render_optional(item.parameterdescription)
             # TODO: is it correct that bodyNodes is either empty or a single paragraph?
@@ -2368,11 +2481,12 @@ class SphinxRenderer:
                 ]
             body = nodes.field_body("", *bodyNodes)
             field = nodes.field("", name, body)
-            fieldList += field
-        return [fieldList]
+            fields.append(field)
+        return [nodes.field_list("", *fields)]
 
     def visit_docdot(self, node) -> List[Node]:
         """Translate node from doxygen's dot command to sphinx's graphviz directive."""
+        graphviz = _get_graphviz_node_class()
         graph_node = graphviz()
         if node.content_ and node.content_[0].getValue().rstrip("\n"):
             graph_node["code"] = node.content_[0].getValue()
@@ -2385,8 +2499,7 @@ class SphinxRenderer:
             )
         graph_node["options"] = {}
         if node.caption:
-            caption_node = nodes.caption(node.caption, "")
-            caption_node += nodes.Text(node.caption)
+            caption_node = nodes.caption(node.caption, "", nodes.Text(node.caption))
             return [nodes.figure("", graph_node, caption_node)]
         return [graph_node]
 
@@ -2401,13 +2514,7 @@ class SphinxRenderer:
         if not os.path.isabs(dot_file_path):
             # Use self.project_info.project_path as the XML_OUTPUT path, and
             # make it absolute with consideration to the conf.py path
-            project_path = self.project_info.project_path()
-            if os.path.isabs(project_path):
-                dot_file_path = os.path.abspath(project_path + os.sep + dot_file_path)
-            else:
-                dot_file_path = os.path.abspath(
-                    self.app.confdir + os.sep + project_path + os.sep + dot_file_path
-                )
+            dot_file_path = self.project_info.abs_path_to_xml_file(dot_file_path)
         try:
             with open(dot_file_path, encoding="utf-8") as fp:
                 dotcode = fp.read()
@@ -2419,71 +2526,79 @@ class SphinxRenderer:
             self.state.document.reporter.warning(exc)  # better safe than sorry
         except RuntimeError as exc:
             self.state.document.reporter.warning(exc)
+        graphviz = _get_graphviz_node_class()
         graph_node = graphviz()
         graph_node["code"] = dotcode
         graph_node["options"] = {"docname": dot_file_path}
         caption = "" if not node.content_ else node.content_[0].getValue()
         if caption:
-            caption_node = nodes.caption(caption, "")
-            caption_node += nodes.Text(caption)
+            caption_node = nodes.caption(caption, "", nodes.Text(caption))
             return [nodes.figure("", graph_node, caption_node)]
         return [graph_node]
 
+    # use graphs' legend from doxygen (v1.9.1)
+    # most colors can be changed via `graphviz_dot_args` in conf.py
+    graph_edge_colors = {
+        # blue (#1414CE) doesn't contrast well in dark mode.
+        # "public-inheritance": "1414CE",  # allow user to customize this one
+        "private-inheritance": "8B1A1A",  # hardcoded
+        "protected-inheritance": "006400",  # hardcoded
+        # the following are demonstrated in the doxygen graphs' legend, but
+        # these don't show in XML properly (bug?); these keys are fiction.
+        "used-internal": "9C35CE",  # should also be dashed
+        "template-instantiated-inheritance": "FFA500",  # should also be dashed
+    }
+
+    graph_dot_prologue = (
+        "digraph {\n"
+        '    graph [bgcolor="#00000000"]\n'  # transparent color for graph's bg
+        '    node [shape=rectangle style=filled fillcolor="#FFFFFF"'
+        " font=Helvetica padding=2]\n"
+        '    edge [color="#1414CE"]\n'
+    )
+
     def visit_docgraph(self, node: compoundsuper.graphType) -> List[Node]:
         """Create a graph (generated by doxygen - not user-defined) from XML using dot
         syntax."""
-        # use graphs' legend from doxygen (v1.9.1)
-        # most colors can be changed via `graphviz_dot_args` in conf.py
-        edge_colors = {
-            # blue (#1414CE) doesn't contrast well in dark mode.
-            # "public-inheritance": "1414CE",  # allow user to customize this one
-            "private-inheritance": "8B1A1A",  # hardcoded
-            "protected-inheritance": "006400",  # hardcoded
-            # the following are demonstrated in the doxygen graphs' legend, but
-            # these don't show in XML properly (bug?); these keys are fiction.
-            "used-internal": "9C35CE",  # should also be dashed
-            "template-instantiated-inheritance": "FFA500",  # should also be dashed
-        }
+        edge_colors = self.graph_edge_colors
 
         # assemble the dot syntax we'll pass to the graphviz directive
-        dot = "digraph {\n"
-        dot += '    graph [bgcolor="#00000000"]\n'  # transparent color for graph's bg
-        dot += '    node [shape=rectangle style=filled fillcolor="#FFFFFF"'
-        dot += " font=Helvetica padding=2]\n"
-        dot += '    edge [color="#1414CE"]\n'
+        dot = [self.graph_dot_prologue]
         relations = []
         for g_node in node.get_node():
-            dot += '    "%s" [label="%s"' % (g_node.get_id(), g_node.get_label())
-            dot += ' tooltip="%s"' % g_node.get_label()
+            dot.append('    "%s" [label="%s"' % (g_node.get_id(), g_node.get_label()))
+            dot.append(' tooltip="%s"' % g_node.get_label())
             if g_node.get_id() == "1":
                 # the disabled grey color is used in doxygen to indicate that the URL is
                 # not set (for the compound in focus). Setting this here doesn't allow
                 # further customization. Maybe remove this since URL is not used?
                 #
-                dot += ' fillcolor="#BFBFBF"'  # hardcoded
+                dot.append(' fillcolor="#BFBFBF"')  # hardcoded
             # URLs from a doxygen refid won't work in sphinx graphviz; we can't convert
             # the refid until all docs are built, and pending references are un-noticed
             # within graphviz directives. Maybe someone wiser will find a way to do it.
             #
-            # dot += ' URL="%s"' % g_node.get_link().get_refid()
-            dot += "]\n"
+            # dot.append(' URL="%s"' % g_node.get_link().get_refid())
+            dot.append("]\n")
             for child_node in g_node.childnode:
-                edge = f'    "{g_node.get_id()}"'
-                edge += f' -> "{child_node.get_refid()}" ['
-                edge += f"dir={node.get_direction()} "
+                relation = child_node.get_relation()
                 # edge labels don't appear in XML (bug?); use tooltip in meantime
-                edge += 'tooltip="%s"' % child_node.get_relation()
-                if child_node.get_relation() in edge_colors.keys():
-                    edge += ' color="#%s"' % edge_colors.get(child_node.get_relation())
-                edge += "]\n"
-                relations.append(edge)
-        for relation in relations:
-            dot += relation
-        dot += "}"
+                edge = (
+                    f'    "{g_node.get_id()}" -> "{child_node.get_refid()}" '
+                    f'[dir={node.get_direction()} tooltip="{relation}"'
+                )
+                color = edge_colors.get(relation)
+                if color is not None:
+                    relations.append(f'{edge} color="#{color}"]\n')
+                else:
+                    relations.append(edge + "]\n")
+        dot.extend(relations)
+        dot.append("}")
 
         # use generated dot syntax to create a graphviz node
+        graphviz = _get_graphviz_node_class()
         graph_node = graphviz()
-        graph_node["code"] = dot
+        graph_node["code"] = "".join(dot)
         graph_node["align"] = "center"
         graph_node["options"] = {}
         caption = node.get_caption()
@@ -2499,31 +2614,32 @@ class SphinxRenderer:
 
     def dispatch_compound(self, node) -> List[Node]:
         """Dispatch handling of a compound node to a suitable visit method."""
-        if node.kind in ["file", "dir", "page", "example", "group"]:
+        if node.kind in _file_like_compound_kinds:
             return self.visit_file(node)
         return self.visit_compound(node)
 
+    # The names of the visit methods for memberdef kinds other than functions and friends. Names
+    # rather than the functions themselves, so that subclasses can override the methods.
+    memberdef_visitors = {
+        "enum": "visit_enum",
+        "typedef": "visit_typedef",
+        "variable": "visit_variable",
+        # Note: visit like variable for now
+        "property": "visit_variable",
+        # Note: visit like variable for now
+        "event": "visit_variable",
+        "define": "visit_define",
+    }
+
     def dispatch_memberdef(self, node) -> List[Node]:
         """Dispatch handling of a memberdef node to a suitable visit method."""
-        if node.kind in ("function", "signal", "slot") or (
-            node.kind == "friend" and node.argsstring
-        ):
+        kind = node.kind
+        if kind in ("function", "signal", "slot") or (kind == "friend" and node.argsstring):
             return self.visit_function(node)
-        if node.kind == "enum":
-            return self.visit_enum(node)
-        if node.kind == "typedef":
-            return self.visit_typedef(node)
-        if node.kind == "variable":
-            return self.visit_variable(node)
-        if node.kind == "property":
-            # Note: visit like variable for now
-            return self.visit_variable(node)
-        if node.kind == "event":
-            # Note: visit like variable for now
-            return self.visit_variable(node)
-        if node.kind == "define":
-            return self.visit_define(node)
-        if node.kind == "friend":
+        visitor = self.memberdef_visitors.get(kind)
+        if visitor is not None:
+            return getattr(self, visitor)(node)
+        if kind == "friend":
             # note, friend functions should be dispatched further up
             return self.visit_friendclass(node)
         return self.render_declaration(node, update_signature=self.update_signature)
@@ -2587,52 +2703,63 @@ class SphinxRenderer:
         #
         # We counter that second issue slightly by allowing through single white spaces
         #
-        stripped = node.strip()
-        if stripped:
-            delimiter = None
-            if "<linebreak>" in stripped:
-                delimiter = "<linebreak>"
-            elif "\n" in stripped:
-                delimiter = "\n"
-            if delimiter:
-                # Render lines as paragraphs because RST doesn't have line breaks.
-                return [
-                    nodes.paragraph("", "", nodes.Text(line.strip()))
-                    for line in node.split(delimiter)
-                    if line.strip()
-                ]
-            # importantly, don't strip whitespace as visit_docpara uses it to collapse
-            # consecutive nodes.Text and rerender them with this function.
-            return [nodes.Text(node)]
-        if node == " ":
-            return [nodes.Text(node)]
-        return []
+        if not node or node.isspace():
+            if node == " ":
+                return [nodes.Text(node)]
+            return []
+
+        delimiter = None
+        if "<linebreak>" in node:
+            delimiter = "<linebreak>"
+        # Only newlines between the first and the last non-whitespace character count
+        elif "\n" in node and "\n" in node.strip():
+            delimiter = "\n"
+        if delimiter:
+            # Render lines as paragraphs because RST doesn't have line breaks.
+            return [
+                nodes.paragraph("", "", nodes.Text(line.strip()))
+                for line in node.split(delimiter)
+                if line.strip()
+            ]
+        # importantly, don't strip whitespace as visit_docpara uses it to collapse
+        # consecutive nodes.Text and rerender them with this function.
+        return [nodes.Text(node)]
 
     def render(self, node, context: Optional[RenderContext] = None) -> List[Node]:
         if context is None:
             self.context = cast(RenderContext, self.context)
             context = self.context.create_child_context(node)
-        with WithContext(self, context):
-            result: List[Node] = []
-            self.context = cast(RenderContext, self.context)
-            if not self.filter_.allow(self.context.node_stack):
-                pass
-            elif isinstance(node, str):
-                result = self.render_string(node)
-            else:
-                method = SphinxRenderer.methods.get(node.node_type, SphinxRenderer.visit_unknown)
-                result = method(self, node)
-        return result
+        # This is what WithContext does, spelled out as render is called for every single node
+        previous = self.context
+        self.set_context(context)
+        try:
+            if not self.filter_.allow(context.node_stack):
+                return []
+            if isinstance(node, str):
+                return self.render_string(node)
+            method = SphinxRenderer.methods.get(node.node_type, SphinxRenderer.visit_unknown)
+            return method(self, node)
+        finally:
+            self.context = previous
+
+    def render_includes(self, includes: List, context: RenderContext) -> List[Node]:
+        """Render the includes of a compound, each in a child of the compound's context."""
+        return list(
+            itertools.chain.from_iterable(
+                self.render(include, context.create_child_context(include)) for include in includes
+            )
+        )
 
     def render_optional(self, node) -> List[Node]:
         """Render a node that can be None."""
         return self.render(node) if node else []
 
     def render_iterable(self, iterable: List) -> List[Node]:
-        output: List[Node] = []
-        for entry in iterable:
-            output.extend(self.render(entry))
-        return output
+        return list(itertools.chain.from_iterable(map(self.render, iterable)))
+
+    def render_text(self, node) -> str:
+        """Render a node and return the text of the result."""
+        return _nodes_to_text(self.render(node))
 
 
 def setup(app: Sphinx) -> None:
@@ -33,9 +33,13 @@ class _NullTargetHandler(TargetHandler):
         return []
 
 
+# Holds no state so can be shared by every directive using the 'no-link' option
+_null_target_handler = _NullTargetHandler()
+
+
 def create_target_handler(
     options: Dict[str, Any], project_info: ProjectInfo, document: nodes.document
 ) -> TargetHandler:
     if "no-link" in options:
-        return _NullTargetHandler()
+        return _null_target_handler
     return _RealTargetHandler(project_info, document)
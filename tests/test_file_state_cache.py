@@ -0,0 +1,119 @@
+import os
+from types import SimpleNamespace
+
+from breathe import file_state_cache
+
+
+def make_app():
+    return SimpleNamespace(env=SimpleNamespace(docname=None))
+
+
+def touch(filename, contents, mtime):
+    with open(filename, "w") as f:
+        f.write(contents)
+    os.utime(filename, (mtime, mtime))
+
+
+def build(app, documents, removed=()):
+    """Runs the hooks in the order Sphinx does for a build which reads the documents, given as a
+    dict of docname to the xml files they use, and returns the ones breathe found to be outdated.
+    """
+
+    removed = set(removed)
+    outdated = file_state_cache._get_outdated(app, app.env, set(), set(), removed)
+
+    for docname in removed:
+        file_state_cache._purge_doc(app, app.env, docname)
+
+    if hasattr(app.env, "breathe_file_state"):
+        docnames = sorted(outdated)
+    else:
+        docnames = sorted(documents)
+    file_state_cache._clear_read_mtimes(app, app.env, docnames)
+    for docname in docnames:
+        file_state_cache._purge_doc(app, app.env, docname)
+        app.env.docname = docname
+        for filename in documents[docname]:
+            file_state_cache.update(app, filename)
+
+    file_state_cache._purge_digests(app, app.env)
+    return sorted(outdated)
+
+
+def test_update_does_not_hash(tmp_path):
+    xml = str(tmp_path / "index.xml")
+    touch(xml, "<doxygen/>", 1000)
+    app = make_app()
+
+    build(app, {"index": [xml]})
+
+    assert app.env.breathe_file_state == {xml: (1000, {"index"})}
+    assert not hasattr(app.env, "breathe_file_digests")
+    assert build(app, {"index": [xml]}) == []
+    assert app.env.breathe_file_digests == {}
+
+
+def test_same_contents_with_new_mtime_is_not_stale(tmp_path):
+    xml = str(tmp_path / "index.xml")
+    touch(xml, "<doxygen/>", 1000)
+    app = make_app()
+    build(app, {"index": [xml]})
+
+    # Nothing to compare against the first time the file is written to
+    touch(xml, "<doxygen/>", 2000)
+    assert build(app, {"index": [xml]}) == ["index"]
+
+    for mtime in [3000, 4000]:
+        touch(xml, "<doxygen/>", mtime)
+        assert build(app, {"index": [xml]}) == []
+        assert app.env.breathe_file_state[xml] == (mtime, {"index"})
+        assert xml in app.env.breathe_file_digests
+
+
+def test_changed_contents_is_stale(tmp_path):
+    xml = str(tmp_path / "index.xml")
+    touch(xml, "<doxygen/>", 1000)
+    app = make_app()
+    build(app, {"index": [xml]})
+
+    touch(xml, "<doxygen/>", 2000)
+    assert build(app, {"index": [xml]}) == ["index"]
+
+    touch(xml, "<doxygen><compounddef/></doxygen>", 3000)
+    assert build(app, {"index": [xml]}) == ["index"]
+
+    # The digest of the new contents is kept for the next build
+    touch(xml, "<doxygen><compounddef/></doxygen>", 4000)
+    assert build(app, {"index": [xml]}) == []
+
+
+def test_digests_of_unreferenced_files_are_dropped(tmp_path):
+    index_xml = str(tmp_path / "index.xml")
+    group_xml = str(tmp_path / "group.xml")
+    touch(index_xml, "<doxygen/>", 1000)
+    touch(group_xml, "<doxygen/>", 1000)
+    app = make_app()
+    build(app, {"index": [index_xml], "group": [group_xml]})
+
+    touch(group_xml, "<doxygen/>", 2000)
+    assert build(app, {"index": [index_xml], "group": [group_xml]}) == ["group"]
+    assert group_xml in app.env.breathe_file_digests
+
+    build(app, {"index": [index_xml]}, removed=["group"])
+    assert app.env.breathe_file_state == {index_xml: (1000, {"index"})}
+    assert app.env.breathe_file_digests == {}
+
+
+def test_read_mtimes_are_kept_per_environment(tmp_path):
+    xml = str(tmp_path / "index.xml")
+    touch(xml, "<doxygen/>", 1000)
+    first_app = make_app()
+    build(first_app, {"index": [xml]})
+
+    touch(xml, "<doxygen/>", 2000)
+    second_app = make_app()
+    build(second_app, {"index": [xml]})
+
+    assert first_app.env.breathe_read_mtimes == {xml: 1000}
+    assert second_app.env.breathe_read_mtimes == {xml: 2000}
+    assert second_app.env.breathe_file_state == {xml: (2000, {"index"})}
@@ -0,0 +1,120 @@
+import os
+
+import pytest
+
+from breathe.finder.factory import FinderFactory
+from breathe.parser import compound, index
+from breathe.renderer.filter import FilterFactory
+
+INDEX_XML = """<?xml version="1.0"?>
+<doxygenindex>
+  <compound refid="namespace_n" kind="namespace"><name>N</name>
+    <member refid="namespace_n_1f" kind="function"><name>f</name></member>
+    <member refid="namespace_n_1color" kind="enum"><name>Color</name></member>
+    <member refid="namespace_n_1red" kind="enumvalue"><name>Red</name></member>
+  </compound>
+  <compound refid="class_n_1_1_a" kind="class"><name>N::A</name>
+    <member refid="class_n_1_1_a_1f" kind="function"><name>f</name></member>
+    <member refid="class_n_1_1_a_1color" kind="enum"><name>Color</name></member>
+    <member refid="class_n_1_1_a_1red" kind="enumvalue"><name>Red</name></member>
+  </compound>
+</doxygenindex>
+"""
+
+COMPOUND_XML = """<?xml version="1.0"?>
+<doxygen>
+  <compounddef id="{id}" kind="{kind}">
+    <compoundname>{name}</compoundname>
+    <sectiondef kind="func">
+      <memberdef kind="function" id="{id}_1f"><name>f</name></memberdef>
+    </sectiondef>
+    <sectiondef kind="enum">
+      <memberdef kind="enum" id="{id}_1color">
+        <name>Color</name>
+        <enumvalue id="{id}_1red"><name>Red</name></enumvalue>
+      </memberdef>
+    </sectiondef>
+  </compounddef>
+</doxygen>
+"""
+
+
+class MockCompoundParser:
+    def __init__(self, xml_dir):
+        self.xml_dir = xml_dir
+
+    def parse(self, refid):
+        return compound.parse(os.path.join(self.xml_dir, "%s.xml" % refid))
+
+
+class MockParserFactory:
+    def __init__(self, xml_dir):
+        self.xml_dir = xml_dir
+
+    def create_index_parser(self):
+        return None
+
+    def create_compound_parser(self, project_info):
+        return MockCompoundParser(self.xml_dir)
+
+
+@pytest.fixture
+def finder(tmp_path):
+    (tmp_path / "index.xml").write_text(INDEX_XML)
+    for refid, kind, name in [
+        ("namespace_n", "namespace", "N"),
+        ("class_n_1_1_a", "class", "N::A"),
+    ]:
+        xml = COMPOUND_XML.format(id=refid, kind=kind, name=name)
+        (tmp_path / ("%s.xml" % refid)).write_text(xml)
+
+    root = index.parse(str(tmp_path / "index.xml"))
+    finder_factory = FinderFactory(None, MockParserFactory(str(tmp_path)))
+    return finder_factory.create_finder_from_root(root, None)
+
+
+def ids(node_stack):
+    return [getattr(node, "refid", None) or getattr(node, "id", None) for node in node_stack]
+
+
+@pytest.mark.parametrize(
+    "create_filter",
+    [
+        lambda factory: factory.create_enumvalue_finder_filter("Red"),
+        lambda factory: factory.create_member_finder_filter("N::A", "f", "function"),
+        lambda factory: factory.create_compound_finder_filter("N::A", "class"),
+    ],
+)
+def test_find_first_matches_first_of_all_matches(finder, create_filter):
+    filter_ = create_filter(FilterFactory(None))
+
+    matches = []
+    finder.filter_(filter_, matches)
+    assert matches
+
+    assert ids(finder.find_first(filter_)) == ids(matches[0])
+
+
+def test_find_first_without_matches(finder):
+    filter_ = FilterFactory(None).create_enumvalue_finder_filter("Blue")
+
+    matches = []
+    finder.filter_(filter_, matches)
+    assert matches == []
+
+    assert finder.find_first(filter_) is None
+
+
+@pytest.mark.parametrize(
+    "kind, name",
+    [("class", "N::A"), ("namespace", "N"), ("class", "N::B"), ("class", "N")],
+)
+def test_find_compounds_matches_compound_finder_filter(finder, kind, name):
+    filter_ = FilterFactory(None).create_compound_finder_filter(name, kind)
+
+    matches = []
+    finder.filter_(filter_, matches)
+
+    assert [ids(node_stack) for node_stack in finder.find_compounds(kind, name)] == [
+        ids(node_stack) for node_stack in matches
+    ]
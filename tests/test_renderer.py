@@ -119,12 +119,17 @@ class MockState:
     def __init__(self, app):
         from breathe.project import ProjectInfoFactory
         from breathe.parser import DoxygenParserFactory
+        from breathe.finder.factory import FinderFactory
+        from breathe.renderer.filter import FilterFactory
 
         env = sphinx.environment.BuildEnvironment(app)
         env.setup(app)
         env.temp_data["docname"] = "mock-doc"
         env.temp_data["breathe_project_info_factory"] = ProjectInfoFactory(app)
-        env.temp_data["breathe_parser_factory"] = DoxygenParserFactory(app)
+        parser_factory = DoxygenParserFactory(app)
+        env.temp_data["breathe_parser_factory"] = parser_factory
+        env.temp_data["breathe_finder_factory"] = FinderFactory(app, parser_factory)
+        env.temp_data["breathe_filter_factory"] = FilterFactory(app)
         settings = frontend.OptionParser(components=(parsers.rst.Parser,)).get_default_values()
         settings.env = env
         self.document = utils.new_document("", settings)
@@ -132,6 +137,7 @@ class MockState:
         # In sphinx 5.3.0 the method state.nested_parse is not called directly
         # so this memo object should exists here
         self.memo = MockMemo()
+        self.state_machine = MockStateMachine()
 
     def nested_parse(self, content, content_offset, contentnode, match_titles=1):
         pass
@@ -290,15 +296,23 @@ def test_find_node():
     check_exception(lambda: find_node([section], "Text"), "the number of nodes Text is 2")
 
 
-def render(
-    app, member_def, domain=None, show_define_initializer=False, compound_parser=None, options=[]
+def create_renderer(
+    app,
+    member_def,
+    domain=None,
+    show_define_initializer=False,
+    compound_parser=None,
+    options=[],
+    order_parameters_first=False,
 ):
-    """Render Doxygen *member_def* with *renderer_class*."""
+    """Create a renderer for Doxygen *member_def*."""
 
     app.config.breathe_separate_member_pages = False
     app.config.breathe_use_project_refids = False
     app.config.breathe_show_define_initializer = show_define_initializer
-    app.config.breathe_order_parameters_first = False
+    app.config.breathe_order_parameters_first = order_parameters_first
+    app.config.breathe_show_include = True
+    app.config.breathe_show_enumvalue_initializer = False
     app.config.breathe_debug_trace_directives = False
     app.config.breathe_debug_trace_doxygen_ids = False
     app.config.breathe_debug_trace_qualification = False
@@ -313,6 +327,17 @@ def render(
         OpenFilter(),
     )
     renderer.context = MockContext(app, [member_def], domain, options)
+    return renderer
+
+
+def render(
+    app, member_def, domain=None, show_define_initializer=False, compound_parser=None, options=[]
+):
+    """Render Doxygen *member_def* with *renderer_class*."""
+
+    renderer = create_renderer(
+        app, member_def, domain, show_define_initializer, compound_parser, options
+    )
     return renderer.render(member_def)
 
 
@@ -538,6 +563,13 @@ def get_directive(app):
     app.config.breathe_domain_by_extension = {}
     app.config.breathe_domain_by_file_pattern = {}
     app.config.breathe_use_project_refids = False
+    app.config.breathe_show_define_initializer = False
+    app.config.breathe_order_parameters_first = False
+    app.config.breathe_show_include = True
+    app.config.breathe_show_enumvalue_initializer = False
+    app.config.breathe_debug_trace_directives = False
+    app.config.breathe_debug_trace_doxygen_ids = False
+    app.config.breathe_debug_trace_qualification = False
     cls_args = (
         "doxygenclass",
         ["at::Tensor"],
@@ -592,3 +624,180 @@ def test_ellipsis(app):
     # Verify that parsing an ellipsis works
     ast_param = cls._parse_args(argsstrings[0])
     ret = cls._resolve_function(matches, ast_param, None)
+
+
+def parse_member_def(xml):
+    from breathe.parser.compoundsuper import memberdefType
+    from xml.dom import minidom
+
+    member_def = memberdefType.factory()
+    member_def.build(minidom.parseString(xml).documentElement)
+    return member_def
+
+
+def parameter_list(kind, *items):
+    return '<parameterlist kind="%s">%s</parameterlist>' % (
+        kind,
+        "".join(
+            "<parameteritem>"
+            "<parameternamelist><parametername>%s</parametername></parameternamelist>"
+            "<parameterdescription><para>%s</para></parameterdescription>"
+            "</parameteritem>" % item
+            for item in items
+        ),
+    )
+
+
+def description_member_def(detaileddescription):
+    return parse_member_def(
+        '<memberdef kind="function" id="f" prot="public" static="no" virt="non-virtual">'
+        "<type>int</type><definition>int f</definition><argsstring>(int a, int b)</argsstring>"
+        "<name>f</name><detaileddescription>%s</detaileddescription></memberdef>"
+        % detaileddescription
+    )
+
+
+MIXED_DESCRIPTION = (
+    "<para>First paragraph.</para>"
+    "<para>"
+    + parameter_list("param", ("a", "The a."), ("b", "The b."))
+    + '<simplesect kind="note"><para>A note.</para></simplesect>'
+    + parameter_list("retval", ("0", "Success."), ("-1", "Failure."))
+    + '<simplesect kind="warning"><para>A warning.</para></simplesect>'
+    + parameter_list("exception", ("std::runtime_error", "On error."))
+    + "</para>"
+    "<para>Last paragraph.</para>"
+)
+
+
+def field_names(field_list):
+    return [field[0].astext() for field in field_list]
+
+
+@pytest.mark.parametrize("order_parameters_first", [False, True])
+def test_detaileddescription_pulls_up_fields_and_admonitions(app, order_parameters_first):
+    member_def = description_member_def(MIXED_DESCRIPTION)
+    renderer = create_renderer(app, member_def, order_parameters_first=order_parameters_first)
+    detailed = renderer.detaileddescription(member_def)
+
+    # The paragraph holding only pulled up nodes is dropped
+    texts = ["First paragraph.", "Last paragraph.", "A note.", "A warning."]
+    if order_parameters_first:
+        assert [n.tagname for n in detailed] == [
+            "paragraph",
+            "paragraph",
+            "field_list",
+            "note",
+            "warning",
+        ]
+        field_list = detailed[2]
+        assert [n.astext() for n in detailed[:2] + detailed[3:]] == texts
+    else:
+        assert [n.tagname for n in detailed] == [
+            "paragraph",
+            "paragraph",
+            "note",
+            "warning",
+            "field_list",
+        ]
+        field_list = detailed[4]
+        assert [n.astext() for n in detailed[:4]] == texts
+
+    # All the parameter lists end up in a single field list, in document order
+    expected_names = ["param a", "param b", "retval 0", "retval -1", "throws std::runtime_error"]
+    if not sphinx.version_info[0:2] >= (4, 3):
+        expected_names = ["param a", "param b", "throws std::runtime_error", "returns"]
+    assert field_names(field_list) == expected_names
+    assert field_list[0][1].astext() == "The a."
+
+
+def test_detaileddescription_keeps_nested_admonitions(app):
+    member_def = description_member_def(
+        "<para>"
+        '<parameterlist kind="param"><parameteritem>'
+        "<parameternamelist><parametername>a</parametername></parameternamelist>"
+        "<parameterdescription><para>The a."
+        '<simplesect kind="note"><para>Noted.</para></simplesect>'
+        "</para></parameterdescription>"
+        "</parameteritem></parameterlist>"
+        '<simplesect kind="note"><para>A note.'
+        '<simplesect kind="warning"><para>Careful.</para></simplesect>'
+        "</para></simplesect>"
+        "</para>"
+    )
+    detailed = create_renderer(app, member_def).detaileddescription(member_def)
+
+    # A note inside a field list stays in the field, and a warning inside a note stays there
+    assert [n.tagname for n in detailed] == ["note", "field_list"]
+    assert find_node(detailed[0], "warning").astext() == "Careful."
+    assert field_names(detailed[1]) == ["param a"]
+    assert find_node(detailed[1], "note").astext() == "Noted."
+
+
+def test_collapse_retvals():
+    from breathe.renderer.sphinxrenderer import collapse_retvals
+
+    def field(name, text):
+        return nodes.field(
+            "",
+            nodes.field_name("", name),
+            nodes.field_body("", nodes.paragraph("", text)),
+        )
+
+    field_list = nodes.field_list(
+        "",
+        field("returns 0", "Success."),
+        field("param a", "The a."),
+        field("returns -1", "Failure."),
+    )
+    collapsed = collapse_retvals(field_list)
+
+    assert field_names(collapsed) == ["param a", "returns"]
+    items = find_node(collapsed[1], "bullet_list")
+    assert [item.astext() for item in items] == ["0 -- Success.", "-1 -- Failure."]
+
+    single = collapse_retvals(nodes.field_list("", field("returns 0", "Success.")))
+    assert field_names(single) == ["returns"]
+    assert single[0][1].astext() == "0 -- Success."
+
+    without_retvals = nodes.field_list("", field("param a", "The a."))
+    assert collapse_retvals(without_retvals) is without_retvals
+
+
+def render_template_param(app, type_, declname):
+    from breathe.parser.compoundsuper import templateparamlistType
+    from xml.dom import minidom
+
+    xml = "<templateparamlist><param><type>%s</type><declname>%s</declname></param>" % (
+        type_,
+        declname,
+    )
+    param_list = templateparamlistType.factory()
+    param_list.build(minidom.parseString(xml + "</templateparamlist>").documentElement)
+    renderer = create_renderer(app, param_list)
+    renderer.state = MockState(app)
+    return "".join(n.astext() for n in renderer.visit_templateparamlist(param_list))
+
+
+@pytest.mark.parametrize(
+    "type_, declname, expected",
+    [
+        ("typename", "T", "typename T"),
+        ("class", "T", "class T"),
+        ("typename...", "Args", "typename... Args"),
+        ("int", "N", "int N"),
+        ("std::size_t", "N", "std::size_t N"),
+    ],
+)
+def test_render_template_param(app, type_, declname, expected):
+    from breathe.renderer.sphinxrenderer import _parse_template_param
+
+    _parse_template_param.cache_clear()
+    assert render_template_param(app, type_, declname) == expected
+    assert _parse_template_param.cache_info().misses == 1
+    assert _parse_template_param.cache_info().hits == 0
+
+    # The parsed declaration is remembered and gives the same output
+    assert render_template_param(app, type_, declname) == expected
+    assert _parse_template_param.cache_info().misses == 1
+    assert _parse_template_param.cache_info().hits == 1